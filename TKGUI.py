@@ -61,11 +61,10 @@ def convert_to_image(file_path, output_dir, dpi, progress_var, status_label):
             libreoffice_path = os.path.join('.', 'LibreOffice-fresh.basic-x86_64.AppImage')
 
         pdf_path = os.path.join(output_dir, f"{base_name}.pdf")
-        if sys.platform.startswith('win'):
-            conversion_cmd = f'"{libreoffice_path}" --headless --convert-to pdf "{file_path}" --outdir "{output_dir}"'
-        else:
-            conversion_cmd = f'{libreoffice_path} --headless --convert-to pdf "{file_path}" --outdir "{output_dir}"'
-        subprocess.run(conversion_cmd, shell=True)
+        conversion_cmd = [libreoffice_path, '--headless', '--convert-to', 'pdf',
+                          file_path, '--outdir', output_dir]
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith('win') else 0
+        subprocess.run(conversion_cmd, creationflags=creationflags)
 
         if not os.path.exists(pdf_path):
             messagebox.showerror("错误", "文件转换为 PDF 失败")
@@ -172,29 +172,36 @@ fi
 if [ -d "dist/File2LongImage.app" ]; then
     echo -e "${GREEN}✓ 应用构建成功！${NC}"
     
-    # 复制 Poppler 二进制文件到应用包
-    echo ""
-    echo "嵌入 Poppler 二进制文件..."
-    
     APP_RESOURCES="dist/File2LongImage.app/Contents/Resources"
-    mkdir -p "$APP_RESOURCES/poppler"
     
-    # 复制必要的 Poppler 工具
-    for tool in pdftoppm pdfinfo pdftocairo pdftotext; do
-        if [ -f "/opt/homebrew/bin/$tool" ]; then
-            cp "/opt/homebrew/bin/$tool" "$APP_RESOURCES/poppler/"
-            echo "  复制 $tool"
-        elif [ -f "/usr/local/bin/$tool" ]; then
-            cp "/usr/local/bin/$tool" "$APP_RESOURCES/poppler/"
-            echo "  复制 $tool"
-        fi
-    done
+    # setup_parallel.py 已自行打包 Poppler 及其依赖库（poppler/lib）时跳过下面的复制
+    if [ -d "$APP_RESOURCES/poppler/lib" ]; then
+        echo ""
+        echo -e "${GREEN}✓ Poppler 已由 setup 脚本打包${NC}"
+    else
+    
+        # 复制 Poppler 二进制文件到应用包
+        echo ""
+        echo "嵌入 Poppler 二进制文件..."
+    
+        mkdir -p "$APP_RESOURCES/poppler"
     
-    # 复制 Poppler 依赖库
-    echo "处理依赖库..."
+        # 复制必要的 Poppler 工具
+        for tool in pdftoppm pdfinfo pdftocairo pdftotext; do
+            if [ -f "/opt/homebrew/bin/$tool" ]; then
+                cp "/opt/homebrew/bin/$tool" "$APP_RESOURCES/poppler/"
+                echo "  复制 $tool"
+            elif [ -f "/usr/local/bin/$tool" ]; then
+                cp "/usr/local/bin/$tool" "$APP_RESOURCES/poppler/"
+                echo "  复制 $tool"
+            fi
+        done
     
-    # 创建修复脚本
-    cat > fix_libs.py << 'EOF'
+        # 复制 Poppler 依赖库
+        echo "处理依赖库..."
+    
+        # 创建修复脚本
+        cat > fix_libs.py << 'EOF'
 import os
 import subprocess
 import shutil
@@ -224,8 +231,10 @@ for tool in os.listdir(poppler_dir):
 print("依赖库处理完成")
 EOF
     
-    python fix_libs.py
-    rm fix_libs.py
+        python fix_libs.py
+        rm fix_libs.py
+    
+    fi  # Poppler 打包
     
     # 代码签名（如果有开发者证书）
     echo ""
@@ -266,8 +275,9 @@ EOF
     
     # 创建临时目录
     mkdir -p dist/dmg
-    # 使用 rsync 代替 cp 以避免复制不存在的文件
-    rsync -av --exclude='*.pyo' --exclude='*.pyc' --exclude='__pycache__' "dist/File2LongImage.app" dist/dmg/ 2>/dev/null || cp -r "dist/File2LongImage.app" dist/dmg/
+    # 用 ditto 复制：保留框架内的符号链接（cp/rsync 展开后体积成倍增加），
+    # 也保留 .pyc，否则每次启动都要从源码重新编译
+    ditto "dist/File2LongImage.app" "dist/dmg/File2LongImage.app"
     
     # 创建应用程序文件夹的符号链接
     ln -s /Applications dist/dmg/Applications
@@ -283,6 +293,12 @@ EOF
     
     echo -e "${GREEN}✓ DMG 安装包创建成功${NC}"
     
+    # 同时生成 zip 发布包（ditto 保留符号链接，等同于 zip -y，避免框架文件被重复打包）
+    echo ""
+    echo "创建 zip 发布包..."
+    ditto -c -k --sequesterRsrc --keepParent "dist/File2LongImage.app" "dist/File2LongImage.zip"
+    echo -e "${GREEN}✓ zip 发布包创建成功${NC}"
+    
     # 输出结果
     echo ""
     echo "========================================="
@@ -291,6 +307,7 @@ EOF
     echo ""
     echo "应用位置: dist/File2LongImage.app"
     echo "安装包: dist/File2LongImage.dmg"
+    echo "发布包: dist/File2LongImage.zip"
     echo ""
     echo "测试运行:"
     echo "  open dist/File2LongImage.app"
@@ -302,8 +319,10 @@ EOF
     # 计算文件大小
     APP_SIZE=$(du -sh dist/File2LongImage.app | cut -f1)
     DMG_SIZE=$(du -sh dist/File2LongImage.dmg | cut -f1)
+    ZIP_SIZE=$(du -sh dist/File2LongImage.zip | cut -f1)
     echo "应用大小: $APP_SIZE"
     echo "DMG 大小: $DMG_SIZE"
+    echo "ZIP 大小: $ZIP_SIZE"
     
 else
     echo -e "${RED}构建失败！${NC}"
@@ -312,4 +331,4 @@ else
 fi
 
 # 退出虚拟环境
-deactivate
\ No newline at end of file
+deactivate
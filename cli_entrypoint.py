@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+File2LongImage 命令行版本
+无界面批量转换，供 BUILD_VARIANT=headless 的精简构建使用，也可直接运行：
+
+    python cli_entrypoint.py a.pdf b.docx --format JPG --dpi 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from config import OUTPUT_DIR, INTERMEDIATE_DIR, LIBREOFFICE_PATH, SUBPROCESS_FLAGS
+import output_cache
+import pdf_renderer
+from image_writer import merge_pages
+
+OFFICE_EXTS = (".doc", ".docx", ".ppt", ".pptx", ".csv", ".xls", ".xlsx",
+               ".odt", ".rtf", ".txt", ".psd", ".cdr", ".wps", ".svg")
+RENDER_PROCESSES = min(4, multiprocessing.cpu_count() or 1)
+
+
+def to_pdf(file_path):
+    """Office 文件经 LibreOffice 转为 PDF，返回 (PDF 路径, 是否为临时文件)"""
+    if file_path.lower().endswith('.pdf'):
+        return file_path, False
+    if not file_path.lower().endswith(OFFICE_EXTS):
+        raise ValueError(f"不支持的文件格式: {os.path.splitext(file_path)[1]}")
+    if LIBREOFFICE_PATH is None:
+        raise ValueError("LibreOffice 未安装，无法转换 Office 文件")
+
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    pdf_path = os.path.join(INTERMEDIATE_DIR, f"{base_name}.pdf")
+    result = subprocess.run([LIBREOFFICE_PATH, '--headless', '--convert-to', 'pdf',
+                             file_path, '--outdir', INTERMEDIATE_DIR],
+                            capture_output=True, creationflags=SUBPROCESS_FLAGS)
+    if result.returncode != 0 or not os.path.exists(pdf_path):
+        raise ValueError(f"文件转换失败: {result.stderr.decode(errors='replace') or '未知错误'}")
+    return pdf_path, True
+
+
+def convert_file(file_path, output_dir, dpi, output_format, quality):
+    """转换单个文件，返回保存的文件路径列表"""
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    output_path = os.path.join(output_dir, f"{base_name}.{output_format.lower()}")
+
+    cache_key = output_cache.cache_key(file_path, dpi, output_format, quality)
+    cached = output_cache.fetch(cache_key, output_path)
+    if cached:
+        return cached
+
+    pdf_path, temp_pdf = to_pdf(file_path)
+    try:
+        render_dpi = pdf_renderer.clamp_dpi(pdf_path, dpi)
+        if render_dpi < dpi:
+            print(f"  页面尺寸过大，DPI 已自动降至 {render_dpi}")
+        mode = pdf_renderer.detect_mode(pdf_path)
+        sizes, pages = pdf_renderer.open_pages(pdf_path, render_dpi,
+                                               workers=RENDER_PROCESSES, mode=mode)
+        if not sizes:
+            raise ValueError("PDF 中没有页面")
+        output_paths = merge_pages(sizes, pages, output_path, output_format, quality, mode)
+    finally:
+        if temp_pdf:
+            try:
+                os.remove(pdf_path)
+            except OSError:
+                pass
+
+    try:
+        output_cache.store(cache_key, output_paths)
+    except OSError:
+        pass  # 缓存写入失败不影响本次转换结果
+    return output_paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="file2longimage",
+                                     description="把 PDF / Office 文档转换为长图")
+    parser.add_argument('files', nargs='+', help="要转换的文件")
+    parser.add_argument('-o', '--output-dir', default=OUTPUT_DIR, help="输出目录")
+    parser.add_argument('--dpi', type=int, default=300, help="渲染 DPI（默认 300）")
+    parser.add_argument('--format', dest='output_format', choices=['PNG', 'JPG'],
+                        type=str.upper, default='PNG', help="输出格式（默认 PNG）")
+    parser.add_argument('--quality', type=int, default=85, help="JPG 质量（默认 85）")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.makedirs(INTERMEDIATE_DIR, exist_ok=True)
+    quality = args.quality if args.output_format == 'JPG' else 85
+
+    failed = 0
+    for idx, file_path in enumerate(args.files, 1):
+        print(f"[{idx}/{len(args.files)}] {os.path.basename(file_path)}")
+        try:
+            for output_path in convert_file(file_path, args.output_dir, args.dpi,
+                                            args.output_format, quality):
+                print(f"  -> {output_path}")
+        except Exception as e:
+            failed += 1
+            print(f"  转换失败: {e}", file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # 打包后多进程渲染需要
+    sys.exit(main())
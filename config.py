@@ -1,5 +1,6 @@
 import sys
 import os
+import subprocess
 
 # 输出目录
 OUTPUT_DIR = "output"
@@ -12,8 +13,13 @@ if sys.platform.startswith('win'):
     POPPLER_PATH = os.path.join("poppler", "poppler-24.07.0", "Library", "bin")
     # 默认poppler路径是当前目录
 elif sys.platform == 'darwin':  # macOS
-    # macOS 上通过 Homebrew 安装的 poppler 通常在这个路径
-    POPPLER_PATH = "/opt/homebrew/bin"
+    # 打包后的应用优先使用包内 Resources/poppler（见 setup_parallel.py 的 collect_poppler）
+    _bundled_poppler = os.path.join(os.environ.get('RESOURCEPATH', ''), 'poppler')
+    if getattr(sys, 'frozen', False) and os.path.exists(os.path.join(_bundled_poppler, 'pdftoppm')):
+        POPPLER_PATH = _bundled_poppler
+    else:
+        # macOS 上通过 Homebrew 安装的 poppler 通常在这个路径
+        POPPLER_PATH = "/opt/homebrew/bin"
 else:
     POPPLER_PATH = "/usr/bin"  # Linux 默认路径
 
@@ -29,4 +35,17 @@ elif sys.platform == 'darwin':  # macOS
         # 如果未安装，设置为 None 或提示用户安装
         LIBREOFFICE_PATH = None
 else:
-    LIBREOFFICE_PATH = "/usr/bin/libreoffice"  # Linux 默认路径
\ No newline at end of file
+    LIBREOFFICE_PATH = "/usr/bin/libreoffice"  # Linux 默认路径
+
+# 单页渲染像素上限（约 200 MP，RGB 约 600 MB）；超出时自动降低 DPI
+MAX_PAGE_PIXELS = 200_000_000
+
+# 单张输出图片的最大高度；更长的文档按页边界拆成多张。
+# 65500 是 libjpeg 的尺寸上限，很多看图软件和移动端浏览器也无法显示更高的图片
+MAX_TILE_HEIGHT = 65500
+
+# 转换结果缓存（INTERMEDIATE_DIR/cache）的容量上限；超出时淘汰最久未使用的结果
+CACHE_MAX_BYTES = 2 << 30  # 2 GB
+
+# 启动外部程序（LibreOffice 等）时的 creationflags：Windows 下不弹出控制台窗口
+SUBPROCESS_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform.startswith('win') else 0
\ No newline at end of file
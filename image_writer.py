@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+长图写出
+逐页把像素编码进 PNG，不需要先在内存中拼出整张长图；
+JPG 在安装了 PyTurboJPEG 时直接调用 libjpeg-turbo 编码，超大画布由临时文件映射承载
+"""
+
+import os
+import struct
+import tempfile
+import zlib
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from config import MAX_TILE_HEIGHT, INTERMEDIATE_DIR
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from turbojpeg import (TurboJPEG, TJPF_RGB, TJPF_RGBX, TJPF_GRAY,
+                           TJSAMP_420, TJSAMP_GRAY, TJFLAG_FASTDCT)
+    _turbo = TurboJPEG() if np is not None else None
+except Exception:  # 未安装，或找不到 libturbojpeg 动态库
+    _turbo = None
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_COLOR_TYPE = {'L': 0, 'RGB': 2}
+_IDAT_SIZE = 1 << 20  # 压缩数据攒够 1 MB 写一个 IDAT 块
+_MEMMAP_BYTES = 512 << 20  # 画布超过 512 MB 时改用临时文件映射
+_TURBO_COPY_BYTES = 64 << 20  # 内存中的图像交给 PyTurboJPEG 前需复制一份，超过该大小不再复制
+_HUGE_PIXELS = 50_000_000  # 超大图像：PNG 用最快压缩，JPG 质量上限 75
+_OPTIMIZE_PIXELS = 10_000_000  # 小于该像素数的 JPG 才做 Huffman 表优化
+
+
+def plan_tiles(heights: Sequence[int], max_height: int = MAX_TILE_HEIGHT) -> List[Tuple[int, int]]:
+    """按页边界把页面依次分组，每组总高度不超过 max_height
+
+    返回各组的页序号范围 [(起始, 结束), ...]；单页本身超过 max_height 时独占一组。
+    heights 为空时返回空列表。
+    """
+    if not heights:
+        return []
+    tiles = []
+    start, height = 0, 0
+    for index, page_height in enumerate(heights):
+        if index > start and height + page_height > max_height:
+            tiles.append((start, index))
+            start, height = index, 0
+        height += page_height
+    tiles.append((start, len(heights)))
+    return tiles
+
+
+def tile_paths(output_path: str, count: int) -> List[str]:
+    """分块输出的文件路径：只有一块时即 output_path，否则为 名称_1.ext、名称_2.ext …"""
+    if count == 1:
+        return [output_path]
+    base, ext = os.path.splitext(output_path)
+    return [f"{base}_{i}{ext}" for i in range(1, count + 1)]
+
+
+def _chunk(tag: bytes, data: bytes) -> bytes:
+    """打包一个 PNG 数据块：长度 + 类型 + 数据 + CRC"""
+    return (struct.pack('>I', len(data)) + tag + data +
+            struct.pack('>I', zlib.crc32(data, zlib.crc32(tag))))
+
+
+def write_png_stream(output_path: str, width: int, height: int,
+                     pages: Iterable[Image.Image], mode: str = 'RGB',
+                     compress_level: int = 3, background='white', center: bool = True,
+                     on_page: Optional[Callable[[int], None]] = None) -> str:
+    """把按顺序到来的页面纵向拼接，直接编码写入 PNG 文件
+
+    任意时刻只持有一页（及其一份带滤波字节的副本），峰值内存与长图总高度无关。
+    比页宽窄的页面用 background（颜色名或与 mode 匹配的值）填充，center 为 True 时水平居中。
+    每写完一页调用 on_page(页序号)，便于上报进度。
+    compress_level 默认 3：长图以大片底色为主，再提高级别体积几乎不变，编码时间却成倍增加。
+    """
+    if mode not in _PNG_COLOR_TYPE:
+        raise ValueError(f"不支持的 PNG 模式: {mode}")
+    bands = len(mode)
+    stride = width * bands
+
+    compressor = zlib.compressobj(compress_level)
+    rows_written = 0
+    with open(output_path, 'wb') as f:
+        f.write(_PNG_SIGNATURE)
+        f.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                            _PNG_COLOR_TYPE[mode], 0, 0, 0)))
+        pending = []
+        pending_size = 0
+
+        for index, page in enumerate(pages):
+            if page.mode != mode:
+                page = page.convert(mode)
+            rows = min(page.height, height - rows_written)
+            if rows <= 0:
+                break
+            if rows < page.height:
+                page = page.crop((0, 0, page.width, rows))
+
+            if page.width != width:
+                # 先把窄页放到整行宽度的条带上
+                strip = Image.new(mode, (width, rows), background)
+                strip.paste(page, ((width - page.width) // 2 if center else 0, 0))
+                page.close()
+                page = strip
+
+            # 每行前需要一个滤波类型字节（0 = None）。把像素字节当作宽为 stride 的
+            # 灰度图贴到宽 stride+1 的画布第 1 列起，tobytes() 即得到带滤波字节的扫描行，
+            # 全程在 C 中完成，无需逐行 Python 循环。
+            raw = Image.frombytes('L', (stride, rows), page.tobytes())
+            page.close()
+            filtered = Image.new('L', (stride + 1, rows), 0)
+            filtered.paste(raw, (1, 0))
+            raw.close()
+            data = compressor.compress(filtered.tobytes())
+            filtered.close()
+            rows_written += rows
+
+            if data:
+                pending.append(data)
+                pending_size += len(data)
+                if pending_size >= _IDAT_SIZE:
+                    f.write(_chunk(b'IDAT', b''.join(pending)))
+                    pending, pending_size = [], 0
+
+            if on_page is not None:
+                on_page(index)
+
+        if rows_written < height:
+            # 页面总高度不足（尺寸预估有误差）时用背景补齐剩余行
+            row = b'\x00' + Image.new(mode, (width, 1), background).tobytes()
+            pending.append(compressor.compress(row * (height - rows_written)))
+
+        pending.append(compressor.flush())
+        f.write(_chunk(b'IDAT', b''.join(pending)))
+        f.write(_chunk(b'IEND', b''))
+
+    return output_path
+
+
+def new_canvas(mode: str, size: Tuple[int, int], color=0) -> Image.Image:
+    """创建合并用的画布，参数同 Image.new
+
+    画布很大且安装了 numpy 时，以 INTERMEDIATE_DIR 下的匿名临时文件（numpy.memmap）
+    作为像素存储：内存紧张时由系统把已写入的部分换出到文件，而不是整个进程被杀掉；
+    编码时顺序读取，也正好利用系统的预读。RGB 画布此时为 'RGBX'（Pillow 只能直接映射
+    每像素 4 字节的布局），粘贴 RGB 页面和保存 JPG 的用法不变；映射数组存于 canvas._array，
+    save_jpeg 可直接把它交给 libjpeg-turbo 而无需复制。
+    """
+    width, height = size
+    bands = 1 if mode == 'L' else 4
+    if np is None or mode not in ('L', 'RGB') or width * height * bands < _MEMMAP_BYTES:
+        return Image.new(mode, size, color)
+
+    raw_mode = 'L' if mode == 'L' else 'RGBX'
+    os.makedirs(INTERMEDIATE_DIR, exist_ok=True)
+    array = np.memmap(tempfile.TemporaryFile(dir=INTERMEDIATE_DIR), dtype=np.uint8,
+                      mode='w+', shape=(height, width, bands))
+    pixel = np.frombuffer(Image.new(raw_mode, (1, 1), color).tobytes(), dtype=np.uint8)
+    if pixel.any():  # 新文件本身全为 0，黑色背景无需填充
+        array[:] = pixel
+    canvas = Image.frombuffer(raw_mode, size, array, 'raw', raw_mode, 0, 1)
+    canvas.readonly = 0  # 映射的内存可写，允许 paste 直接写入而不是先复制一份
+    canvas._array = array
+    return canvas
+
+
+def save_jpeg(image: Image.Image, output_path: str, quality: int = 85,
+              optimize: bool = False) -> str:
+    """保存 JPG
+
+    不需要 optimize（额外的 Huffman 表优化）时，若可用则交给 PyTurboJPEG：
+    一次调用完成 4:2:0 子采样 + 快速 DCT 编码，绕过 Pillow 的逐行编码回调。
+    new_canvas 的文件映射画布直接传入映射数组（零复制）；内存中的图像经 np.asarray
+    会复制一份像素，只在不超过 _TURBO_COPY_BYTES 时这样做，否则由 Pillow 逐行编码。
+    """
+    array = None
+    if _turbo is not None and not optimize:
+        array = getattr(image, '_array', None)
+        if (array is None and image.mode in ('RGB', 'L') and
+                image.width * image.height * len(image.mode) <= _TURBO_COPY_BYTES):
+            array = np.asarray(image)
+    if array is not None:
+        if image.mode == 'L':
+            array = array.reshape(image.height, image.width, 1)  # 灰度需要 (高, 宽, 1) 的形状
+            pixel_format, subsample = TJPF_GRAY, TJSAMP_GRAY
+        else:
+            pixel_format = TJPF_RGBX if image.mode == 'RGBX' else TJPF_RGB
+            subsample = TJSAMP_420
+        data = _turbo.encode(array, quality=quality, pixel_format=pixel_format,
+                             jpeg_subsample=subsample, flags=TJFLAG_FASTDCT)
+        del array
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return output_path
+
+    image.save(output_path, format="JPEG", quality=quality, optimize=optimize)
+    return output_path
+
+
+def merge_pages(sizes: Sequence[Tuple[int, int]], pages: Iterable[Image.Image],
+                output_path: str, output_format: str = 'PNG', quality: int = 85,
+                mode: str = 'RGB', background='white', center: bool = True,
+                on_page: Optional[Callable[[int], None]] = None,
+                warn: Callable[[str], None] = print) -> List[str]:
+    """把按顺序到来的页面合并为长图，返回实际保存的文件路径列表
+
+    sizes 为各页尺寸，用于预先确定输出尺寸；pages 逐页交出图像，每页用完立即释放。
+    总高度超过 MAX_TILE_HEIGHT 时按页边界拆成多张（名称_1、名称_2 …）。
+    on_page(页序号) 在每页写入后调用；warn 接收降级保存等提示。
+    """
+    if not sizes:
+        raise ValueError("没有可合并的页面")
+    pages = iter(pages)
+    tiles = plan_tiles([height for _, height in sizes])
+    output_paths = []
+    for (first, last), tile_path in zip(tiles, tile_paths(output_path, len(tiles))):
+        tile_on_page = None
+        if on_page is not None:
+            tile_on_page = lambda index, first=first: on_page(first + index)
+        output_paths.append(_merge_tile(
+            sizes[first:last], islice(pages, last - first), tile_path, output_format,
+            quality, mode, background, center, tile_on_page, warn))
+    return output_paths
+
+
+def _merge_tile(sizes, pages, output_path, output_format, quality, mode,
+                background, center, on_page, warn) -> str:
+    """把一组页面合并为一张图片，返回实际保存的文件路径"""
+    widths, heights = zip(*sizes)
+    total_height = sum(heights)
+    max_width = max(widths)
+    total_pixels = max_width * total_height
+    is_huge_image = total_pixels > _HUGE_PIXELS
+
+    if output_format != "JPG":
+        # PNG 边合并边编码，不分配整张画布；超大图像用最快的压缩级别
+        return write_png_stream(output_path, max_width, total_height, pages, mode=mode,
+                                compress_level=1 if is_huge_image else 3,
+                                background=background, center=center, on_page=on_page)
+
+    merged_image = new_canvas(mode, (max_width, total_height), background)
+    y_offset = 0
+    for index, img in enumerate(pages):
+        x_offset = (max_width - img.width) // 2 if center else 0
+        merged_image.paste(img, (x_offset, y_offset))
+        y_offset += img.height
+        img.close()
+        del img
+        if on_page is not None:
+            on_page(index)
+
+    # 超大图像降低质量、不做 optimize，编码速度可提升一个数量级
+    if is_huge_image:
+        quality = min(quality, 75)
+    try:
+        # 画布本身就是 JPEG 可直接编码的 RGB/RGBX/L，无需再 convert 复制一份
+        return save_jpeg(merged_image, output_path, quality,
+                         optimize=total_pixels < _OPTIMIZE_PIXELS)
+    except OSError as e:
+        if "encoder error" not in str(e).lower():
+            raise
+
+    # JPEG 编码出错时依次尝试更保守的参数、改存 PNG
+    warn("JPEG 编码出现问题，尝试其他保存方式...")
+    try:
+        merged_image.save(output_path, format="JPEG", quality=min(quality, 85),
+                          optimize=False, progressive=False, subsampling=2)
+        return output_path
+    except OSError:
+        warn("JPEG 保存失败，改为保存为 PNG 格式")
+    if merged_image.mode == 'RGBX':  # 文件映射的画布，PNG 不支持该模式
+        merged_image = merged_image.convert('RGB')
+    output_path = os.path.splitext(output_path)[0] + '.png'
+    merged_image.save(output_path, format="PNG", compress_level=3)
+    return output_path
@@ -15,15 +15,27 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
 import queue
+import multiprocessing
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
 from enum import Enum
-from config import OUTPUT_DIR, POPPLER_PATH, LIBREOFFICE_PATH, INTERMEDIATE_DIR
+from config import OUTPUT_DIR, POPPLER_PATH, LIBREOFFICE_PATH, INTERMEDIATE_DIR, SUBPROCESS_FLAGS
+import pdf_renderer
+from image_writer import merge_pages
+import output_cache
+from office_server import OfficeServer
 
 # 增加 PIL 的最大图像像素限制
 Image.MAX_IMAGE_PIXELS = 500000000  # 5亿像素
 
+# 单个 PDF 内部并行渲染页面的进程数
+RENDER_PROCESSES = min(4, os.cpu_count() or 1)
+
+# 需要先由 LibreOffice 转换为 PDF 的格式
+OFFICE_EXTS = (".doc", ".docx", ".ppt", ".pptx", ".csv",
+               ".xls", ".xlsx", ".odt", ".rtf", ".txt")
+
 class ConversionStep(Enum):
     """转换步骤枚举"""
     DETECTING = "检测文件类型"
@@ -35,9 +47,12 @@ class ConversionStep(Enum):
     COMPLETED = "完成"
     ERROR = "错误"
 
-@dataclass
+# Python 3.10+ 的 dataclass 支持 slots：实例没有 __dict__，更小，属性读取也更快
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ProgressUpdate:
-    """进度更新数据类"""
+    """进度更新数据类（不可变，创建后在线程间只读传递）"""
     file_index: int
     total_files: int
     file_name: str
@@ -104,12 +119,19 @@ class File2LongImageApp:
         self.setup_ui()
         self.setup_macos_features()
         self.current_files = []
+        self._file_set = set()  # 与 current_files 同步，O(1) 判断是否已添加
         self.processing = False
         self.progress_queue = queue.Queue(maxsize=100)
         self.current_progress_state = None  # 保存当前进度状态
         self.file_start_time = None  # 记录当前文件开始时间
+        # 后台线程只写这里，由界面线程的定时器统一刷新，避免逐条跨线程投递 Tcl 回调
+        self._ui_lock = threading.Lock()
+        self._ui_state = {'status': None}
         self.start_progress_monitor()
         self.start_time_updater()  # 启动时间更新器
+        # 预先启动常驻 LibreOffice 服务（需安装 unoserver），启动开销只付一次
+        self.office_server = OfficeServer()
+        self.office_server.start()
         
     def setup_ui(self):
         """设置用户界面"""
@@ -155,7 +177,10 @@ class File2LongImageApp:
         scrollbar = ttk.Scrollbar(list_frame)
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
+        # 列表内容绑定到变量，增删文件时一次 set 即可整体刷新
+        self.files_var = tk.Variable(value=[])
         self.file_listbox = tk.Listbox(list_frame, height=6, 
+                                       listvariable=self.files_var,
                                        yscrollcommand=scrollbar.set,
                                        selectmode=tk.EXTENDED)
         self.file_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -352,16 +377,24 @@ class File2LongImageApp:
     def start_progress_monitor(self):
         """启动进度监控"""
         def monitor():
+            # 一次取完队列中积压的更新，只重绘最新的一条；错误更新需逐条提示，不能合并
+            latest = None
             try:
                 while True:
                     update = self.progress_queue.get_nowait()
                     self.current_progress_state = update  # 保存当前状态
                     if update.step == ConversionStep.DETECTING:
                         self.file_start_time = time.time()  # 记录文件开始时间
-                    self.update_progress_display(update)
+                    if update.step == ConversionStep.ERROR:
+                        self.update_progress_display(update)
+                        latest = None
+                    else:
+                        latest = update
             except queue.Empty:
                 pass
             finally:
+                if latest is not None:
+                    self.update_progress_display(latest)
                 self.root.after(50, monitor)  # 每50ms检查一次
         
         monitor()
@@ -369,6 +402,12 @@ class File2LongImageApp:
     def start_time_updater(self):
         """启动时间更新器 - 实时更新已用时间"""
         def update_time():
+            # 应用后台线程写入的状态文字（只保留最新一条）
+            with self._ui_lock:
+                status, self._ui_state['status'] = self._ui_state['status'], None
+            if status is not None:
+                self.status_label.config(text=status)
+            
             # 只在处理中且有文件开始时间时更新
             if self.processing and self.file_start_time and self.current_progress_state:
                 elapsed = time.time() - self.file_start_time
@@ -385,34 +424,45 @@ class File2LongImageApp:
         
         update_time()
     
+    def set_status(self, text):
+        """后台线程设置状态文字，下一次定时刷新时显示"""
+        with self._ui_lock:
+            self._ui_state['status'] = text
+    
     def update_progress_display(self, update: ProgressUpdate):
         """更新进度显示"""
+        # 各字段只读取一次
+        step, step_progress = update.step, update.step_progress
+        file_index, total_files = update.file_index, update.total_files
+        current_page, total_pages = update.current_page, update.total_pages
+        elapsed_time = update.elapsed_time
+        
         # 更新总体进度
-        overall_percent = ((update.file_index + update.step_progress/100) / update.total_files) * 100
+        overall_percent = ((file_index + step_progress/100) / total_files) * 100
         self.overall_progress_var.set(overall_percent)
-        self.overall_label.config(text=f"文件 {update.file_index + 1}/{update.total_files} ({overall_percent:.1f}%)")
+        self.overall_label.config(text=f"文件 {file_index + 1}/{total_files} ({overall_percent:.1f}%)")
         
         # 更新文件信息
         self.file_name_label.config(text=update.file_name)
-        self.step_label.config(text=f"步骤: {update.step.value}")
-        self.step_progress_var.set(update.step_progress)
+        self.step_label.config(text=f"步骤: {step.value}")
+        self.step_progress_var.set(step_progress)
         
         # 更新详细信息
-        if update.total_pages > 0:
+        if total_pages > 0:
             self.page_progress_label.config(
-                text=f"{update.current_page}/{update.total_pages} 页"
+                text=f"{current_page}/{total_pages} 页"
             )
-            if update.current_page > 0 and update.elapsed_time > 0:
-                speed = update.current_page / update.elapsed_time
+            if current_page > 0 and elapsed_time > 0:
+                speed = current_page / elapsed_time
                 self.processing_speed_label.config(text=f"{speed:.1f} 页/秒")
         else:
             self.page_progress_label.config(text="-")
         
         # 更新时间信息
-        self.elapsed_time_label.config(text=self.format_time(update.elapsed_time))
+        self.elapsed_time_label.config(text=self.format_time(elapsed_time))
         
         # 错误处理
-        if update.step == ConversionStep.ERROR:
+        if step == ConversionStep.ERROR:
             messagebox.showerror("转换错误", update.error_message)
     
     def format_time(self, seconds: float) -> str:
@@ -470,23 +520,32 @@ class File2LongImageApp:
     
     def add_files(self, files):
         """添加文件到列表"""
-        for file in files:
-            if file not in self.current_files:
-                self.current_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        file_set = self._file_set
+        new_files = [f for f in dict.fromkeys(files) if f not in file_set]
+        file_set.update(new_files)
+        self.current_files.extend(new_files)
+        self.refresh_file_list()
         
         if self.current_files:
             self.convert_btn.config(state=tk.NORMAL)
             self.status_label.config(text=f"已选择 {len(self.current_files)} 个文件")
     
+    def refresh_file_list(self):
+        """按 current_files 刷新列表框（一次 Tcl 调用，而非逐项 insert/delete）"""
+        basename = os.path.basename
+        self.files_var.set([basename(f) for f in self.current_files])
+    
     def remove_selected(self):
         """删除选中的文件"""
         selection = self.file_listbox.curselection()
         if selection:
-            # 从后往前删除，避免索引变化
-            for index in reversed(selection):
-                self.file_listbox.delete(index)
-                del self.current_files[index]
+            # 一次遍历重建列表，避免逐个 pop 的 O(N²)
+            selected = set(selection)
+            self.current_files = [f for i, f in enumerate(self.current_files)
+                                  if i not in selected]
+            self._file_set = set(self.current_files)
+            self.file_listbox.selection_clear(0, tk.END)
+            self.refresh_file_list()
             
             if not self.current_files:
                 self.convert_btn.config(state=tk.DISABLED)
@@ -497,7 +556,8 @@ class File2LongImageApp:
     def clear_files(self):
         """清空文件列表"""
         self.current_files = []
-        self.file_listbox.delete(0, tk.END)
+        self._file_set.clear()
+        self.refresh_file_list()
         self.convert_btn.config(state=tk.DISABLED)
         self.status_label.config(text="准备就绪")
     
@@ -506,12 +566,17 @@ class File2LongImageApp:
         if not self.current_files or self.processing:
             return
         
+        # 在界面线程中读取转换参数，后台线程不再访问 Tk 变量
+        output_format = self.format_var.get()
+        quality = self.quality_var.get() if output_format == "JPG" else 85
+        
         # 在新线程中执行转换
-        thread = threading.Thread(target=self.convert_files)
+        thread = threading.Thread(target=self.convert_files,
+                                  args=(self.dpi_var.get(), output_format, quality))
         thread.daemon = True
         thread.start()
     
-    def convert_files(self):
+    def convert_files(self, dpi, output_format, quality):
         """转换文件（在后台线程中运行）"""
         self.processing = True
         self.root.after(0, lambda: self.convert_btn.config(state=tk.DISABLED))
@@ -527,6 +592,12 @@ class File2LongImageApp:
         total_files = len(self.current_files)
         success_count = 0
         failed_files = []
+        split_files = []  # 过长而拆成多张的文件
+        
+        # 多个 Office 文件一次性交给 LibreOffice，只付一次启动开销；
+        # 已有缓存结果的文件不再转换 PDF
+        batch_pdfs = self.batch_convert_office(
+            [f for f in self.current_files if not self._cached(f, dpi, output_format, quality)])
         
         for idx, file_path in enumerate(self.current_files):
             try:
@@ -534,25 +605,18 @@ class File2LongImageApp:
                 tracker.start_file(idx, total_files, file_name)
                 
                 # 更新状态
-                self.root.after(0, lambda i=idx, f=file_path, t=total_files: 
-                    self.status_label.config(
-                        text=f"正在转换 ({i+1}/{t}): {os.path.basename(f)}"
-                    )
-                )
-                
-                # 获取转换参数
-                dpi = self.dpi_var.get()
-                output_format = self.format_var.get()
-                quality = self.quality_var.get() if output_format == "JPG" else 85
+                self.set_status(f"正在转换 ({idx+1}/{total_files}): {file_name}")
                 
                 # 执行转换
-                output_path = self.convert_single_file_with_progress(
+                output_paths = self.convert_single_file_with_progress(
                     file_path, OUTPUT_DIR, dpi, output_format, quality, 
-                    tracker, idx, total_files
+                    tracker, idx, total_files, batch_pdfs.get(file_path)
                 )
                 
-                if output_path:
+                if output_paths:
                     success_count += 1
+                    if len(output_paths) > 1:
+                        split_files.append(f"{file_name}: {', '.join(map(os.path.basename, output_paths))}")
                     tracker.update_step(idx, total_files, file_name, 
                                       ConversionStep.COMPLETED, 100)
                 else:
@@ -570,38 +634,90 @@ class File2LongImageApp:
         
         # 转换完成
         self.processing = False
-        self.root.after(0, self.conversion_complete, success_count, failed_files)
+        self.root.after(0, self.conversion_complete, success_count, failed_files, split_files)
+    
+    @staticmethod
+    def _cached(file_path, dpi, output_format, quality):
+        """该文件在当前参数下是否已有缓存结果（读取失败时视为没有）"""
+        try:
+            return bool(output_cache.lookup(
+                output_cache.cache_key(file_path, dpi, output_format, quality)))
+        except OSError:
+            return False
+    
+    def batch_convert_office(self, files):
+        """用一次 LibreOffice 调用把多个 Office 文件转换为 PDF
+        
+        返回 {源文件: 生成的 PDF 路径}。只处理文件名（不含扩展名）互不相同的文件，
+        否则输出会互相覆盖；未包含或转换失败的文件仍走单文件转换，并报告各自的错误。
+        """
+        if LIBREOFFICE_PATH is None or self.office_server.ready():
+            return {}  # 常驻服务可用时逐个转换已足够快
+        
+        by_base = {}
+        for file_path in files:
+            if file_path.lower().endswith(OFFICE_EXTS):
+                base_name = os.path.splitext(os.path.basename(file_path))[0]
+                by_base.setdefault(base_name, []).append(file_path)
+        batch = {paths[0]: os.path.join(INTERMEDIATE_DIR, f"{base_name}.pdf")
+                 for base_name, paths in by_base.items() if len(paths) == 1}
+        if len(batch) < 2:
+            return {}
+        
+        self.set_status(f"正在将 {len(batch)} 个 Office 文件转换为 PDF...")
+        # 清掉上次遗留的同名中间文件，以便据文件是否存在判断本次是否转换成功
+        for pdf_path in batch.values():
+            try:
+                os.remove(pdf_path)
+            except OSError:
+                pass
+        
+        cmd = [LIBREOFFICE_PATH, '--headless', '--convert-to', 'pdf',
+               '--outdir', INTERMEDIATE_DIR, *batch]
+        subprocess.run(cmd, capture_output=True, creationflags=SUBPROCESS_FLAGS)
+        
+        return {src: pdf for src, pdf in batch.items() if os.path.exists(pdf)}
     
     def convert_single_file_with_progress(self, file_path, output_dir, dpi, 
                                          output_format, quality, tracker, 
-                                         file_idx, total_files):
-        """带进度跟踪的单文件转换"""
-        images = []
+                                         file_idx, total_files, converted_pdf=None):
+        """带进度跟踪的单文件转换
+        
+        converted_pdf 为批量转换阶段已生成的中间 PDF（如有），此时跳过 LibreOffice。
+        """
         base_name = os.path.splitext(os.path.basename(file_path))[0]
         file_name = os.path.basename(file_path)
+        temp_pdf = False  # 中间 PDF 需在合并完成后删除
         
         # 步骤1: 检测文件类型
         tracker.update_step(file_idx, total_files, file_name, 
                           ConversionStep.DETECTING, 100)
-        time.sleep(0.1)  # 短暂延迟让用户看到状态
+        
+        # 相同内容、相同参数已转换过时直接复用缓存的输出
+        output_path = os.path.join(output_dir, f"{base_name}.{output_format.lower()}")
+        cache_key = output_cache.cache_key(file_path, dpi, output_format, quality)
+        cached = output_cache.fetch(cache_key, output_path)  # 命中时为文件路径列表
+        if cached:
+            if converted_pdf:  # 同内容的另一文件刚写入缓存时，批量阶段的 PDF 已用不上
+                try:
+                    os.remove(converted_pdf)
+                except OSError:
+                    pass
+            tracker.update_step(file_idx, total_files, file_name, 
+                              ConversionStep.SAVING_OUTPUT, 100)
+            return cached
         
         # 步骤2: 转换为PDF（如果需要）
         if file_path.lower().endswith('.pdf'):
-            # 步骤3: 加载PDF
-            tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.LOADING_PDF, 50)
+            pdf_path = file_path
             
-            # 步骤4: 渲染页面
+        elif converted_pdf:
+            pdf_path = converted_pdf
+            temp_pdf = True
             tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.RENDERING_PAGES, 0)
+                              ConversionStep.CONVERTING_TO_PDF, 100)
             
-            # 使用自定义回调来跟踪页面渲染进度
-            images = self.convert_pdf_with_progress(
-                file_path, dpi, tracker, file_idx, total_files, file_name
-            )
-            
-        elif file_path.lower().endswith((".doc", ".docx", ".ppt", ".pptx", ".csv", 
-                                        ".xls", ".xlsx", ".odt", ".rtf", ".txt")):
+        elif file_path.lower().endswith(OFFICE_EXTS):
             if LIBREOFFICE_PATH is None:
                 raise ValueError("LibreOffice 未安装，无法转换 Office 文件")
             
@@ -610,94 +726,109 @@ class File2LongImageApp:
                               ConversionStep.CONVERTING_TO_PDF, 0)
             
             pdf_path = os.path.join(INTERMEDIATE_DIR, f"{base_name}.pdf")
-            conversion_cmd = f'{LIBREOFFICE_PATH} --headless --convert-to pdf "{file_path}" --outdir "{INTERMEDIATE_DIR}"'
-            
-            # 异步执行转换并监控进度
-            process = subprocess.Popen(conversion_cmd, shell=True, 
-                                     stdout=subprocess.PIPE, 
-                                     stderr=subprocess.PIPE)
-            
-            # 模拟进度（LibreOffice 不提供进度信息）
-            start_time = time.time()
-            while process.poll() is None:
-                elapsed = time.time() - start_time
-                # 假设最多30秒，显示进度
-                progress = min(elapsed / 30 * 100, 95)
-                tracker.update_step(file_idx, total_files, file_name, 
-                                  ConversionStep.CONVERTING_TO_PDF, progress)
-                time.sleep(0.5)
-            
-            if process.returncode == 0 and os.path.exists(pdf_path):
+            if self.office_server.convert(file_path, pdf_path):
+                # 常驻服务完成转换
                 tracker.update_step(file_idx, total_files, file_name, 
                                   ConversionStep.CONVERTING_TO_PDF, 100)
+                temp_pdf = True
+            else:
+                # 服务不可用或转换失败，回退为单独启动 soffice
+                conversion_cmd = [LIBREOFFICE_PATH, '--headless', '--convert-to', 'pdf',
+                                  file_path, '--outdir', INTERMEDIATE_DIR]
                 
-                # 步骤3: 加载PDF
-                tracker.update_step(file_idx, total_files, file_name, 
-                                  ConversionStep.LOADING_PDF, 50)
+                # 异步执行转换并监控进度（参数列表直接启动，不经过 shell）
+                process = subprocess.Popen(conversion_cmd, 
+                                         stdout=subprocess.PIPE, 
+                                         stderr=subprocess.PIPE,
+                                         creationflags=SUBPROCESS_FLAGS)
                 
-                # 步骤4: 渲染页面
-                images = self.convert_pdf_with_progress(
-                    pdf_path, dpi, tracker, file_idx, total_files, file_name
-                )
+                # 模拟进度（LibreOffice 不提供进度信息）。communicate 在进程退出时立即返回，
+                # 不必睡满整个轮询间隔，同时持续读取输出管道，避免输出过多时子进程阻塞
+                start_time = time.monotonic()
+                while True:
+                    try:
+                        stdout, stderr = process.communicate(timeout=0.5)
+                        break
+                    except subprocess.TimeoutExpired:
+                        elapsed = time.monotonic() - start_time
+                        # 假设最多30秒，显示进度
+                        progress = min(elapsed / 30 * 100, 95)
+                        tracker.update_step(file_idx, total_files, file_name, 
+                                          ConversionStep.CONVERTING_TO_PDF, progress)
                 
-                try:
-                    os.remove(pdf_path)
-                except:
-                    pass
-            else:
-                stdout, stderr = process.communicate()
-                raise ValueError(f"文件转换失败: {stderr.decode() if stderr else '未知错误'}")
+                if process.returncode == 0 and os.path.exists(pdf_path):
+                    tracker.update_step(file_idx, total_files, file_name, 
+                                      ConversionStep.CONVERTING_TO_PDF, 100)
+                    temp_pdf = True
+                else:
+                    raise ValueError(f"文件转换失败: {stderr.decode() if stderr else '未知错误'}")
         else:
             raise ValueError(f"不支持的文件格式: {os.path.splitext(file_path)[1]}")
         
-        if images:
-            # 步骤5: 合并图像
+        try:
+            # 步骤3: 加载PDF
             tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.MERGING_IMAGES, 0)
+                              ConversionStep.LOADING_PDF, 50)
             
-            output_path = os.path.join(output_dir, f"{base_name}.{output_format.lower()}")
+            # 大幅面页面按单页像素上限自动降低 DPI，避免分配不出内存
+            render_dpi = pdf_renderer.clamp_dpi(pdf_path, dpi)
+            if render_dpi < dpi:
+                self.set_status(f"{file_name} 页面尺寸过大，DPI 已自动降至 {render_dpi}")
+                dpi = render_dpi
+            
+            # 步骤4: 渲染页面（逐页渲染，在合并时按需取用）
+            sizes, pages, mode = self.convert_pdf_with_progress(
+                pdf_path, dpi, tracker, file_idx, total_files, file_name
+            )
+            if not sizes:
+                return None
+            
+            # 步骤5: 边渲染边合并
             result = self.merge_images_with_progress(
-                images, output_path, output_format, quality, 
-                tracker, file_idx, total_files, file_name
+                sizes, pages, output_path, output_format, quality, 
+                tracker, file_idx, total_files, file_name, mode
             )
+            if result:
+                try:
+                    output_cache.store(cache_key, result)
+                except OSError:
+                    pass  # 缓存写入失败不影响本次转换结果
             
             # 步骤6: 保存输出
             tracker.update_step(file_idx, total_files, file_name, 
                               ConversionStep.SAVING_OUTPUT, 100)
             
             return result
-        
-        return None
+        finally:
+            if temp_pdf:
+                try:
+                    os.remove(pdf_path)
+                except:
+                    pass
     
     def convert_pdf_with_progress(self, pdf_path, dpi, tracker, 
                                  file_idx, total_files, file_name):
-        """带进度跟踪的PDF转换 - 优化版本"""
+        """带进度跟踪的PDF转换 - 优化版本
+        
+        返回 (各页尺寸, 逐页图像迭代器, 图像模式)。PyMuPDF 下页面在迭代时才渲染，
+        且全灰度文档以 'L' 模式输出。
+        """
         try:
-            # 性能优化：一次性转换所有页面，比逐页快很多
             tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.RENDERING_PAGES, 10)
-            
-            # 使用 thread_count 参数加速（如果系统支持）
-            images = pdf2image.convert_from_path(
-                pdf_path, 
-                poppler_path=POPPLER_PATH, 
-                dpi=dpi,
-                thread_count=4  # 使用多线程
-            )
-            
-            # 更新完成进度
-            tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.RENDERING_PAGES, 100,
-                              len(images), len(images))
-            
-            return images
+                              ConversionStep.RENDERING_PAGES, 0)
+            mode = pdf_renderer.detect_mode(pdf_path)
+            # 性能优化：PyMuPDF 进程内逐页渲染（未安装时为 pdf2image 多线程批量渲染）
+            sizes, pages = pdf_renderer.open_pages(pdf_path, dpi, workers=RENDER_PROCESSES,
+                                                   mode=mode)
+            return sizes, pages, mode
             
         except Exception as e:
             # 如果批量失败，回退到逐页（兼容性）
             print(f"批量渲染失败，回退到逐页模式: {e}")
-            return self.convert_pdf_with_progress_fallback(
+            images = self.convert_pdf_with_progress_fallback(
                 pdf_path, dpi, tracker, file_idx, total_files, file_name
             )
+            return [img.size for img in images], pdf_renderer.drain(images), 'RGB'
     
     def convert_pdf_with_progress_fallback(self, pdf_path, dpi, tracker, 
                                           file_idx, total_files, file_name):
@@ -723,86 +854,40 @@ class File2LongImageApp:
         
         return images
     
-    def merge_images_with_progress(self, images, output_path, output_format, 
-                                  quality, tracker, file_idx, total_files, file_name):
-        """带进度跟踪的图像合并"""
-        if not images:
+    def merge_images_with_progress(self, sizes, pages, output_path, output_format, 
+                                  quality, tracker, file_idx, total_files, file_name,
+                                  mode='RGB'):
+        """带进度跟踪的图像合并，返回保存的文件路径列表
+        
+        sizes 为各页尺寸，用于预先确定输出尺寸；pages 逐页交出图像，
+        每页用完立即释放，任意时刻只持有一页。PNG 逐页直接编码写出，不分配整张画布。
+        总高度超过 MAX_TILE_HEIGHT 时按页边界拆成多张（名称_1、名称_2 …）。
+        """
+        if not sizes:
             return None
         
-        # 计算合并后的尺寸
-        widths, heights = zip(*(i.size for i in images))
-        total_height = sum(heights)
-        max_width = max(widths)
+        total_pages = len(sizes)
         
-        tracker.update_step(file_idx, total_files, file_name, 
-                          ConversionStep.MERGING_IMAGES, 20)
-        
-        # 创建合并后的图像
-        merged_image = Image.new('RGB', (max_width, total_height), 'white')
-        y_offset = 0
-        
-        # 粘贴所有图像
-        for i, img in enumerate(images):
-            x_offset = (max_width - img.width) // 2
-            merged_image.paste(img, (x_offset, y_offset))
-            y_offset += img.height
-            
-            # 更新进度
-            progress = 20 + (i + 1) / len(images) * 60  # 20-80%
+        def report_page(i):
+            # 更新进度（页面在此处才渲染，按渲染进度显示页数）
             tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.MERGING_IMAGES, progress)
-        
-        # 保存图像
-        tracker.update_step(file_idx, total_files, file_name, 
-                          ConversionStep.MERGING_IMAGES, 90)
-        
-        # 根据图像大小动态调整策略
-        total_pixels = max_width * total_height
-        is_huge_image = total_pixels > 50_000_000  # 5000万像素
+                              ConversionStep.RENDERING_PAGES, 
+                              (i + 1) / total_pages * 100,
+                              i + 1, total_pages)
         
         try:
-            if output_format == "JPG":
-                merged_image = merged_image.convert("RGB")
-                
-                # 性能优化：对于超大图像，自动降低质量
-                if is_huge_image and quality > 75:
-                    quality = 75
-                    print(f"提示：检测到超大图像，自动降低JPG质量至{quality}以提升性能")
-                
-                # 关键优化：去掉 optimize=True，或仅对小图像使用
-                if total_pixels < 10_000_000:  # 小于1000万像素才优化
-                    merged_image.save(output_path, format="JPEG", 
-                                    quality=quality, optimize=True)
-                else:
-                    # 大图像不使用optimize，速度提升10-100倍！
-                    merged_image.save(output_path, format="JPEG", 
-                                    quality=quality, optimize=False)
-            else:  # PNG
-                # 性能优化：PNG压缩级别调整
-                # compress_level: 0(无压缩,最快) - 9(最大压缩,最慢)
-                if is_huge_image:
-                    # 超大图像使用低压缩级别
-                    merged_image.save(output_path, format="PNG", 
-                                    compress_level=1, optimize=False)
-                    print("提示：使用快速PNG压缩以提升性能")
-                elif total_pixels < 10_000_000:
-                    # 小图像可以使用优化
-                    merged_image.save(output_path, format="PNG", 
-                                    compress_level=6, optimize=True)
-                else:
-                    # 中等图像平衡质量和速度
-                    merged_image.save(output_path, format="PNG", 
-                                    compress_level=3, optimize=False)
-            
-            tracker.update_step(file_idx, total_files, file_name, 
-                              ConversionStep.MERGING_IMAGES, 100)
-        except Exception as e:
+            output_paths = merge_pages(sizes, pages, output_path, output_format, quality,
+                                       mode, on_page=report_page)
+        except OSError as e:
             raise ValueError(f"保存图像失败: {str(e)}")
         
-        return output_path
+        tracker.update_step(file_idx, total_files, file_name, 
+                          ConversionStep.MERGING_IMAGES, 100)
+        return output_paths
     
-    def conversion_complete(self, success_count, failed_files):
+    def conversion_complete(self, success_count, failed_files, split_files=()):
         """转换完成后的处理"""
+        self.set_status(None)  # 丢弃尚未显示的进行中状态，以免覆盖下面的完成状态
         self.convert_btn.config(state=tk.NORMAL)
         self.reset_progress_display()
         
@@ -813,6 +898,8 @@ class File2LongImageApp:
             messagebox.showwarning("转换完成", message)
         else:
             message = f"所有 {success_count} 个文件转换成功！"
+            if split_files:
+                message += "\n\n以下文件过长，已按页拆分为多张图片:\n" + "\n".join(split_files[:10])
             messagebox.showinfo("转换完成", message)
             
             # 打开输出文件夹
@@ -914,6 +1001,9 @@ def main():
     root.minsize(600, 400)
     
     root.mainloop()
+    pdf_renderer.shutdown_pool()  # 窗口关闭后立即结束渲染子进程
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # 打包后的应用中，渲染子进程也从这里启动
+    multiprocessing.freeze_support()
+    main()
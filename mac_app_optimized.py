@@ -176,12 +176,8 @@ class OptimizedImageMerger:
                     merged_image.save(output_path, format="PNG", 
                                     compress_level=1, optimize=False)
                     print("提示：使用快速PNG压缩以提升性能")
-                elif total_pixels < 10_000_000:
-                    # 小图像可以使用优化
-                    merged_image.save(output_path, format="PNG", 
-                                    compress_level=6, optimize=True)
                 else:
-                    # 中等图像平衡质量和速度
+                    # 级别 3 与 6 的体积相差无几；optimize=True 会改用级别 9，这里不用
                     merged_image.save(output_path, format="PNG", 
                                     compress_level=3, optimize=False)
             
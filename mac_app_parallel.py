@@ -5,28 +5,39 @@ File2LongImage macOS Application - 并行处理版本
 """
 
 import os
+import re
 import sys
 import time
 import subprocess
 import pdf2image
 from pdf2image import pdfinfo_from_path
+from pdf2image.exceptions import PDFPageCountError
 from PIL import Image
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
-import queue
 from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import Path
-from dataclasses import dataclass, field
 from typing import Optional, Dict, List
 from enum import Enum
-from config import OUTPUT_DIR, POPPLER_PATH, LIBREOFFICE_PATH, INTERMEDIATE_DIR
+from config import OUTPUT_DIR, POPPLER_PATH, LIBREOFFICE_PATH, INTERMEDIATE_DIR, SUBPROCESS_FLAGS
 import uuid
+import logging
+import importlib
 from error_logger import ErrorLogger, ErrorLog
 
 # 增加 PIL 的最大图像像素限制
 Image.MAX_IMAGE_PIXELS = 500000000
 
+logger = logging.getLogger(__name__)
+
+# 并发数上限（线程池大小）
+MAX_WORKERS_CAP = 5
+
+# 需要先经 LibreOffice 转换为 PDF 的文件扩展名
+_OFFICE_EXTS = frozenset({'.doc', '.docx', '.ppt', '.pptx', '.csv',
+                          '.xls', '.xlsx', '.odt', '.rtf', '.txt'})
+
 class FileStatus(Enum):
     """文件状态枚举"""
     PENDING = "等待中"
@@ -46,26 +57,182 @@ class ConversionStep(Enum):
     SAVING_OUTPUT = "保存文件"
     COMPLETED = "完成"
 
-@dataclass
 class FileTask:
-    """文件任务数据类"""
-    task_id: str
-    file_path: str
-    file_name: str
-    status: FileStatus = FileStatus.PENDING
-    progress: float = 0.0
-    current_step: str = ""
-    error_message: str = ""
-    error_log: Optional[ErrorLog] = None  # 详细错误日志
-    start_time: Optional[float] = None
-    end_time: Optional[float] = None
-    output_path: Optional[str] = None
-    future: Optional[Future] = None
-    cancel_event: threading.Event = field(default_factory=threading.Event)
-    pause_event: threading.Event = field(default_factory=threading.Event)
-    
-    def __post_init__(self):
-        self.pause_event.set()  # 默认不暂停
+    """文件任务（使用 __slots__，任务很多时也只占少量内存）"""
+    __slots__ = (
+        'task_id', 'file_path', 'file_name', 'base_name',
+        'status', 'progress', 'current_step',
+        'error_message', '_error_log', '_display_log', '_clipboard_log', 'log_file',
+        'start_time', 'end_time',
+        'output_path', 'output_exists', 'output_size',
+        'future', 'cancelled', '_pause_event', 'lock',
+        'dirty', 'row_stale', 'row_refreshed',
+    )
+    
+    def __init__(self, task_id: str, file_path: str, file_name: str):
+        self.task_id = task_id
+        self.file_path = file_path
+        self.file_name = file_name
+        self.base_name = os.path.splitext(file_name)[0]  # 不含扩展名的文件名
+        self.status = FileStatus.PENDING
+        self.progress = 0.0
+        self.current_step = ""
+        self.error_message = ""
+        self._error_log: Optional[ErrorLog] = None  # 详细错误日志
+        self._display_log: Optional[str] = None  # 格式化结果缓存
+        self._clipboard_log: Optional[str] = None
+        self.log_file: Optional[str] = None  # 已保存的错误日志路径
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.output_path: Optional[str] = None
+        self.output_exists = False  # 输出文件已成功写入（UI据此判断，不再 stat）
+        self.output_size = 0  # 输出文件大小（字节），完成时在工作线程中记录
+        self.future: Optional[Future] = None
+        self.cancelled = False  # 取消标志，供热循环无锁读取
+        self._pause_event: Optional[threading.Event] = None  # 首次暂停时才创建
+        self.lock = threading.Lock()  # 保护状态转换
+        self.dirty = False  # 已登记到待刷新列表、尚未被UI线程取走
+        self.row_stale = True  # 状态或步骤变化后需整行刷新；否则只刷新进度单元格
+        self.row_refreshed = 0.0  # 上次整行刷新的时间（time.monotonic）
+    
+    @property
+    def error_log(self) -> Optional[ErrorLog]:
+        return self._error_log
+    
+    @error_log.setter
+    def error_log(self, log: Optional[ErrorLog]):
+        self._error_log = log
+        self._display_log = self._clipboard_log = None
+    
+    def display_log(self) -> str:
+        """详细错误日志的显示文本（首次调用时格式化并缓存）"""
+        if self._display_log is None:
+            self._display_log = ErrorLogger.format_log_for_display(self._error_log)
+        return self._display_log
+    
+    def clipboard_log(self) -> str:
+        """详细错误日志的 Markdown 文本（首次调用时格式化并缓存）"""
+        if self._clipboard_log is None:
+            self._clipboard_log = ErrorLogger.format_log_for_clipboard(self._error_log)
+        return self._clipboard_log
+    
+    def pause(self):
+        """让工作线程在下一个检查点停下"""
+        if self._pause_event is None:
+            self._pause_event = threading.Event()
+        else:
+            self._pause_event.clear()
+    
+    def resume(self):
+        """解除暂停"""
+        if self._pause_event is not None:
+            self._pause_event.set()
+    
+    def wait_if_paused(self):
+        """工作线程检查点：暂停时阻塞直到继续或取消"""
+        event = self._pause_event
+        if event is not None:
+            event.wait()
+
+# 任务状态对应的 TreeView 标签（颜色在 setup_ui 中配置）
+_STATUS_TAGS = {
+    FileStatus.COMPLETED: ('completed',),
+    FileStatus.FAILED: ('failed',),
+    FileStatus.PROCESSING: ('processing',),
+}
+
+# 预先生成的百分比文本及带进度条的文本（10 格），进度刷新时直接查表
+_PCT_STR = tuple(f"{i}%" for i in range(101))
+_BAR_STR = tuple('█' * (i // 10) + '░' * (10 - i // 10) + ' ' + _PCT_STR[i] for i in range(101))
+
+# 仅进度变化时整行（用时、速度）刷新的最短间隔（秒）
+_ROW_REFRESH_INTERVAL = 1.0
+
+# 任务状态机：允许的 (源状态, 目标状态)，所有状态变更都由 _transition 校验
+_S = FileStatus
+_ALLOWED = frozenset({
+    (_S.PENDING, _S.PROCESSING),      # 开始
+    (_S.PROCESSING, _S.PAUSED),       # 暂停
+    (_S.PAUSED, _S.PROCESSING),       # 继续
+    (_S.PROCESSING, _S.CANCELLED),    # 取消
+    (_S.PAUSED, _S.CANCELLED),
+    (_S.PROCESSING, _S.COMPLETED),    # 工作线程结束
+    (_S.PROCESSING, _S.FAILED),
+    (_S.PAUSED, _S.COMPLETED),        # 暂停时已越过检查点，工作线程照常结束
+    (_S.PAUSED, _S.FAILED),
+    (_S.FAILED, _S.PENDING),          # 重试
+})
+del _S
+
+# 平台相关的打开/显示命令（导入时确定一次）
+if sys.platform == 'darwin':
+    _OPEN_ARGV = ['open']
+    _REVEAL_ARGV = ['open', '-R']
+elif sys.platform == 'win32':
+    _OPEN_ARGV = None  # 使用 os.startfile
+    _REVEAL_ARGV = ['explorer', '/select,']
+else:  # Linux
+    _OPEN_ARGV = ['xdg-open']
+    _REVEAL_ARGV = None  # 无法选中文件，打开所在目录
+
+
+# 错误关键字 → 建议分组。一次正则扫描找出所有命中的关键字，
+# 再按 _ERR_PRIORITY 的顺序取第一个，与原先 if/elif 的优先级一致
+_ERR_PATTERN = re.compile(
+    r'libreoffice|poppler|permission|权限|memory|内存|timeout|超时|corrupt|损坏|not found|找不到',
+    re.IGNORECASE,
+)
+_ERR_GROUPS = {
+    'libreoffice': 'libreoffice',
+    'poppler': 'poppler',
+    'permission': 'permission', '权限': 'permission',
+    'memory': 'memory', '内存': 'memory',
+    'timeout': 'timeout', '超时': 'timeout',
+    'corrupt': 'corrupt', '损坏': 'corrupt',
+    'not found': 'not_found', '找不到': 'not_found',
+}
+_ERR_PRIORITY = ('libreoffice', 'poppler', 'permission', 'memory', 'timeout', 'corrupt', 'not_found')
+_ERR_SUGGESTIONS = {
+    'libreoffice': ("安装 LibreOffice: brew install --cask libreoffice",
+                    "确保 LibreOffice 路径正确配置"),
+    'poppler': ("安装 Poppler: brew install poppler",
+                "检查 Poppler 路径配置"),
+    'permission': ("检查文件读取权限",
+                   "确保输出目录有写入权限"),
+    'memory': ("降低 DPI 设置",
+               "关闭其他应用释放内存",
+               "分批处理大文件"),
+    'timeout': ("增加超时时间设置",
+                "检查网络连接（如果涉及网络资源）"),
+    'corrupt': ("文件可能已损坏，尝试修复或使用其他工具打开",
+                "检查文件是否完整下载"),
+    'not_found': ("确认文件路径正确",
+                  "检查文件是否被移动或删除"),
+}
+_DEFAULT_SUGGESTIONS = ("检查文件格式是否支持",
+                        "尝试降低转换质量或DPI",
+                        "查看系统日志获取更多信息")
+
+def _launch(argv):
+    """启动外部程序后立即返回，不等待其退出"""
+    subprocess.Popen(argv, close_fds=True, stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _open(path):
+    """用系统默认程序打开文件或目录"""
+    if _OPEN_ARGV is None:
+        os.startfile(path)  # 本身即不阻塞
+    else:
+        _launch(_OPEN_ARGV + [path])
+
+
+def _reveal(path):
+    """在文件管理器中显示文件"""
+    if _REVEAL_ARGV is None:
+        _open(os.path.dirname(path))
+    else:
+        _launch(_REVEAL_ARGV + [path])
 
 class ParallelFile2LongImageApp:
     def __init__(self, root):
@@ -84,13 +251,40 @@ class ParallelFile2LongImageApp:
         
         # 核心数据结构
         self.tasks: Dict[str, FileTask] = {}  # task_id -> FileTask
-        self.executor = ThreadPoolExecutor(max_workers=3)  # 并发执行器
+        # 按状态索引任务ID（dict 作有序集合，保持加入顺序），批量操作只遍历相关子集
+        # 各状态的桶预先建好且不再替换，工作线程转换状态时无需担心桶被换掉
+        self._by_status: Dict[FileStatus, Dict[str, None]] = {s: {} for s in FileStatus}
+        # 线程池按上限一次性创建并长期复用，实际并发数由信号量控制
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS_CAP,
+                                           thread_name_prefix='f2li')
         self.max_workers = 3  # 最大并发数
-        self.update_queue = queue.Queue()  # UI更新队列
+        self._slots = threading.Semaphore(self.max_workers)
+        # 工作线程 → UI 的刷新通知：仅在任务 dirty 由 False 变 True 时加锁登记
+        self._pending_lock = threading.Lock()
+        self._pending: List[FileTask] = []
+        self._has_dirty = threading.Event()
+        self._closing = False
+        self._dirty: set = set()  # 待刷新的任务ID
+        self._flush_scheduled = False
         
         self.setup_ui()
         self.setup_menu()
+        self.setup_error_window()
         self.start_ui_updater()
+        
+        # 界面绘制完成后在后台预热首次转换才会用到的模块
+        threading.Thread(target=self._warm_imports, daemon=True).start()
+    
+    def _warm_imports(self):
+        """后台预加载首次转换才会用到的模块，避免第一次点击"开始"时卡顿"""
+        # 注册 PNG/JPEG 等编解码插件（否则在第一次 open/save 时才加载）
+        Image.preinit()
+        # 工作线程和错误日志中按需导入的模块
+        for name in ('shutil', 'psutil'):
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass  # 可选依赖缺失时，相关功能会自行降级
     
     def setup_ui(self):
         """设置用户界面"""
@@ -121,7 +315,7 @@ class ParallelFile2LongImageApp:
         # 并发控制
         ttk.Label(control_frame, text="并发数:").pack(side='left', padx=(20, 5))
         self.workers_var = tk.IntVar(value=3)
-        workers_spin = ttk.Spinbox(control_frame, from_=1, to=5, width=5,
+        workers_spin = ttk.Spinbox(control_frame, from_=1, to=MAX_WORKERS_CAP, width=5,
                                    textvariable=self.workers_var,
                                    command=self.update_max_workers)
         workers_spin.pack(side='left')
@@ -150,6 +344,11 @@ class ParallelFile2LongImageApp:
         self.file_tree.column('信息', width=80)
         self.file_tree.column('用时', width=80)
         
+        # 配置状态标签颜色（只需配置一次）
+        self.file_tree.tag_configure('completed', foreground='green')
+        self.file_tree.tag_configure('failed', foreground='red')
+        self.file_tree.tag_configure('processing', foreground='blue')
+        
         # 滚动条
         scrollbar = ttk.Scrollbar(list_frame, orient='vertical', 
                                  command=self.file_tree.yview)
@@ -323,6 +522,7 @@ class ParallelFile2LongImageApp:
                         file_name=os.path.basename(file_path)
                     )
                     self.tasks[task_id] = task
+                    self._by_status[task.status][task_id] = None
                     
                     # 添加到TreeView
                     self.file_tree.insert('', 'end', iid=task_id, 
@@ -333,35 +533,68 @@ class ParallelFile2LongImageApp:
     
     def start_all(self):
         """开始所有待处理的文件"""
-        for task_id, task in self.tasks.items():
-            if task.status == FileStatus.PENDING:
-                self.start_task(task_id)
+        for task_id in list(self._by_status[FileStatus.PENDING]):
+            self.start_task(task_id)
     
     def start_selected(self):
-        """开始选中的文件"""
+        """开始（或继续）选中的文件"""
         selected = self.file_tree.selection()
         for task_id in selected:
             if task_id in self.tasks:
                 self.start_task(task_id)
     
+    def _transition(self, task: FileTask, new_status: FileStatus) -> bool:
+        """按状态机转换任务状态并同步状态索引；不允许的转换返回 False。
+        
+        所有状态变更都应经过这里。UI 线程和工作线程可能同时转换同一任务，
+        检查与修改在任务锁内完成。
+        """
+        with task.lock:
+            old_status = task.status
+            if (old_status, new_status) not in _ALLOWED:
+                return False
+            task.status = new_status
+            task.row_stale = True
+            self._by_status[old_status].pop(task.task_id, None)
+            if task.task_id in self.tasks:
+                self._by_status[new_status][task.task_id] = None
+        return True
+    
     def start_task(self, task_id: str):
-        """开始单个任务"""
+        """开始单个任务；暂停的任务则继续执行"""
         task = self.tasks.get(task_id)
-        if not task or task.status not in [FileStatus.PENDING, FileStatus.PAUSED]:
+        if not task:
+            return
+        
+        resuming = task.status is FileStatus.PAUSED
+        if not self._transition(task, FileStatus.PROCESSING):
+            return
+        if resuming:
+            # 暂停的任务已在线程池中，只需放行，不能重复提交
+            task.resume()
+            self._mark_dirty(task_id)
             return
         
         # 提交到线程池
-        task.status = FileStatus.PROCESSING
         task.start_time = time.time()
-        task.pause_event.set()  # 确保不暂停
-        task.cancel_event.clear()  # 清除取消标志
+        task.resume()  # 确保不暂停
+        task.cancelled = False
         
         # 提交转换任务
-        future = self.executor.submit(self.convert_file_worker, task)
+        future = self.executor.submit(self._run_task, task)
         task.future = future
         
         # 更新UI
-        self.update_task_display(task_id)
+        self._mark_dirty(task_id)
+    
+    def _run_task(self, task: FileTask):
+        """线程池任务入口：先占用并发槽位再执行转换"""
+        # 排队期间已取消的任务直接丢弃，不占用槽位，也不做任何准备工作
+        # （状态已由 _do_cancel 置为 CANCELLED）
+        if task.cancelled:
+            return
+        with self._slots:
+            self.convert_file_worker(task)
     
     def convert_file_worker(self, task: FileTask):
         """工作线程：转换文件"""
@@ -372,8 +605,7 @@ class ParallelFile2LongImageApp:
             quality = self.quality_var.get() if output_format == "JPG" else 85
             
             # 检查取消
-            if task.cancel_event.is_set():
-                task.status = FileStatus.CANCELLED
+            if task.cancelled:
                 return
             
             # 步骤1：检测文件
@@ -384,22 +616,21 @@ class ParallelFile2LongImageApp:
                 raise FileNotFoundError(f"文件不存在: {task.file_path}")
             
             # 检查暂停
-            task.pause_event.wait()
+            task.wait_if_paused()
             
             images = []
-            base_name = os.path.splitext(task.file_name)[0]
+            base_name = task.base_name
+            ext = os.path.splitext(task.file_path)[1].lower()
             
             # PDF直接处理
-            if task.file_path.lower().endswith('.pdf'):
+            if ext == '.pdf':
                 self.update_task_progress(task, ConversionStep.RENDERING_PAGES, 20)
                 images = self.convert_pdf_parallel(task, dpi)
                 if not images:
                     raise ValueError(f"PDF转换失败: 无法从PDF提取图像")
                 
             # Office文件
-            elif task.file_path.lower().endswith((".doc", ".docx", ".ppt", ".pptx", 
-                                                  ".csv", ".xls", ".xlsx", ".odt", 
-                                                  ".rtf", ".txt")):
+            elif ext in _OFFICE_EXTS:
                 if LIBREOFFICE_PATH is None:
                     raise ValueError("LibreOffice 未安装，无法转换Office文件")
                 
@@ -418,7 +649,7 @@ class ParallelFile2LongImageApp:
                 if pdf_size == 0:
                     raise ValueError(f"PDF生成失败: 生成的PDF文件为空")
                 
-                print(f"PDF生成成功: {pdf_path} ({pdf_size} bytes)")
+                logger.debug("PDF生成成功: %s (%d bytes)", pdf_path, pdf_size)
                 
                 self.update_task_progress(task, ConversionStep.RENDERING_PAGES, 50)
                 images = self.convert_pdf_parallel(task, dpi, pdf_path)
@@ -429,7 +660,7 @@ class ParallelFile2LongImageApp:
                     try:
                         import shutil
                         shutil.copy(pdf_path, debug_pdf)
-                        print(f"调试: PDF已保存到 {debug_pdf}")
+                        logger.debug("调试: PDF已保存到 %s", debug_pdf)
                     except:
                         pass
                     raise ValueError(f"PDF渲染失败: 无法从临时PDF提取图像\nPDF路径: {pdf_path}\nPDF大小: {pdf_size} bytes")
@@ -438,37 +669,42 @@ class ParallelFile2LongImageApp:
                 try:
                     os.remove(pdf_path)
                 except Exception as e:
-                    print(f"警告: 无法删除临时PDF: {e}")
+                    logger.warning("无法删除临时PDF: %s", e)
             else:
-                raise ValueError(f"不支持的文件格式: {os.path.splitext(task.file_path)[1]}")
+                raise ValueError(f"不支持的文件格式: {ext}")
             
             # 检查取消
-            if task.cancel_event.is_set():
-                task.status = FileStatus.CANCELLED
+            if task.cancelled:
                 return
             
             # 合并图像
             if images:
-                print(f"开始合并 {len(images)} 张图像")
+                logger.debug("开始合并 %d 张图像", len(images))
                 self.update_task_progress(task, ConversionStep.MERGING_IMAGES, 70)
                 output_path = os.path.join(OUTPUT_DIR, f"{base_name}.{output_format.lower()}")
-                task.output_path = self.merge_images_fast(images, output_path, 
-                                                          output_format, quality, task)
+                merged_path = self.merge_images_fast(images, output_path,
+                                                     output_format, quality, task)
                 
-                if not task.output_path:
+                if not merged_path:
                     raise ValueError("图像合并失败")
                 
-                # 完成
-                task.status = FileStatus.COMPLETED
+                # 完成；转换被拒绝说明任务已在收尾前被取消，保持取消状态不变
+                if not self._transition(task, FileStatus.COMPLETED):
+                    return
+                task.output_path = merged_path
+                task.output_size = os.path.getsize(merged_path)
+                task.output_exists = True
                 task.end_time = time.time()
                 task.progress = 100
                 self.update_task_progress(task, ConversionStep.COMPLETED, 100)
-                print(f"转换成功: {task.output_path}")
+                logger.debug("转换成功: %s", task.output_path)
             else:
                 raise ValueError("无法生成图像: images列表为空")
                 
         except Exception as e:
-            task.status = FileStatus.FAILED
+            # 已取消的任务不再记为失败
+            if not self._transition(task, FileStatus.FAILED):
+                return
             task.error_message = str(e)
             task.end_time = time.time()
             
@@ -489,57 +725,45 @@ class ParallelFile2LongImageApp:
             
             # 保存日志到文件
             try:
-                log_file = ErrorLogger.save_to_file(task.error_log)
-                print(f"错误日志已保存: {log_file}")
+                task.log_file = ErrorLogger.save_to_file(task.error_log)
+                logger.debug("错误日志已保存: %s", task.log_file)
             except:
                 pass
         
         finally:
             # 更新最终状态
-            self.update_queue.put(('update', task.task_id))
+            self._notify(task)
     
     def convert_pdf_parallel(self, task: FileTask, dpi: int, pdf_path: str = None) -> List:
         """并行转换PDF"""
         if pdf_path is None:
             pdf_path = task.file_path
         
-        print(f"开始转换PDF: {pdf_path}")
-        print(f"DPI: {dpi}, Poppler路径: {POPPLER_PATH}")
+        logger.debug("开始转换PDF: %s", pdf_path)
+        logger.debug("DPI: %d, Poppler路径: %s", dpi, POPPLER_PATH)
         
         try:
-            # 首先检查PDF是否有效
-            from pdf2image import pdfinfo_from_path
+            # 批量转换（pdf2image 内部已会读取页数，无需预先调用 pdfinfo）
             try:
-                info = pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)
-                print(f"PDF信息: 页数={info.get('Pages', 0)}, 加密={info.get('Encrypted', False)}")
-                
-                if info.get('Encrypted', False):
-                    raise ValueError("PDF文件已加密，无法处理")
-                
-                if info.get('Pages', 0) == 0:
-                    raise ValueError("PDF文件没有页面")
-                    
-            except Exception as e:
-                print(f"PDF信息获取失败: {e}")
-                # 继续尝试转换
-            
-            # 批量转换
-            images = pdf2image.convert_from_path(
-                pdf_path,
-                poppler_path=POPPLER_PATH,
-                dpi=dpi,
-                thread_count=2,  # 子线程内使用2个线程
-                fmt='png',  # 明确指定输出格式
-                use_pdftocairo=False  # 使用pdftoppm而非pdftocairo
-            )
+                images = pdf2image.convert_from_path(
+                    pdf_path,
+                    poppler_path=POPPLER_PATH,
+                    dpi=dpi,
+                    thread_count=2,  # 子线程内使用2个线程
+                    fmt='png',  # 明确指定输出格式
+                    use_pdftocairo=False  # 使用pdftoppm而非pdftocairo
+                )
+            except PDFPageCountError as e:
+                # pdfinfo 无法读取页数：通常是加密或损坏的PDF
+                raise ValueError("PDF文件已加密或损坏，无法处理") from e
             
-            print(f"PDF转换成功: 生成了 {len(images)} 张图像")
+            logger.debug("PDF转换成功: 生成了 %d 张图像", len(images))
             return images
             
+        except ValueError:
+            raise
         except Exception as e:
-            print(f"PDF转换失败: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("PDF转换失败: %s: %s", type(e).__name__, e, exc_info=True)
             return []
     
     def convert_to_pdf(self, task: FileTask) -> Optional[str]:
@@ -547,9 +771,8 @@ class ParallelFile2LongImageApp:
         # 确保中间目录存在
         os.makedirs(INTERMEDIATE_DIR, exist_ok=True)
         
-        base_name = os.path.splitext(task.file_name)[0]
+        base_name = task.base_name
         # 处理文件名中的特殊字符 - 更全面的替换
-        import re
         # 替换所有非字母数字和中文的字符为下划线
         safe_base_name = re.sub(r'[^a-zA-Z0-9一-鿿._-]', '_', base_name)
         # 移除多个连续的下划线
@@ -574,25 +797,26 @@ class ParallelFile2LongImageApp:
             '--outdir', INTERMEDIATE_DIR
         ]
         
-        print(f"执行LibreOffice转换: {' '.join(conversion_cmd)}")
+        logger.debug("执行LibreOffice转换: %s", conversion_cmd)
         # 不使用shell=True，避免特殊字符问题
-        result = subprocess.run(conversion_cmd, capture_output=True, text=True)
+        result = subprocess.run(conversion_cmd, capture_output=True, text=True,
+                                creationflags=SUBPROCESS_FLAGS)
         
         # 输出调试信息
         if result.stdout:
-            print(f"LibreOffice stdout: {result.stdout}")
+            logger.debug("LibreOffice stdout: %s", result.stdout)
         if result.stderr:
-            print(f"LibreOffice stderr: {result.stderr}")
+            logger.debug("LibreOffice stderr: %s", result.stderr)
         
         # LibreOffice可能使用原始文件名生成PDF
-        original_pdf_path = os.path.join(INTERMEDIATE_DIR, f"{os.path.splitext(task.file_name)[0]}.pdf")
+        original_pdf_path = os.path.join(INTERMEDIATE_DIR, f"{base_name}.pdf")
         
         # 检查两个可能的路径
         if os.path.exists(pdf_path):
-            print(f"PDF生成成功(安全名): {pdf_path}")
+            logger.debug("PDF生成成功(安全名): %s", pdf_path)
             return pdf_path
         elif os.path.exists(original_pdf_path):
-            print(f"PDF生成成功(原始名): {original_pdf_path}")
+            logger.debug("PDF生成成功(原始名): %s", original_pdf_path)
             # 重命名为安全名
             try:
                 os.rename(original_pdf_path, pdf_path)
@@ -600,27 +824,30 @@ class ParallelFile2LongImageApp:
             except:
                 return original_pdf_path
         else:
-            print(f"PDF生成失败: 找不到输出文件")
-            print(f"检查路径: {pdf_path}")
-            print(f"检查路径: {original_pdf_path}")
+            logger.warning("PDF生成失败: 找不到输出文件")
+            logger.debug("检查路径: %s", pdf_path)
+            logger.debug("检查路径: %s", original_pdf_path)
             # 列出中间目录内容，查找任何PDF文件
             try:
                 files = os.listdir(INTERMEDIATE_DIR)
-                print(f"{INTERMEDIATE_DIR} 目录内容: {files}")
+                logger.debug("%s 目录内容: %s", INTERMEDIATE_DIR, files)
                 # 查找任何PDF文件
                 pdf_files = [f for f in files if f.lower().endswith('.pdf')]
                 if pdf_files:
-                    print(f"找到PDF文件: {pdf_files}")
+                    logger.debug("找到PDF文件: %s", pdf_files)
                     # 使用找到的第一个PDF
                     found_pdf = os.path.join(INTERMEDIATE_DIR, pdf_files[0])
-                    print(f"使用找到的PDF: {found_pdf}")
+                    logger.debug("使用找到的PDF: %s", found_pdf)
                     return found_pdf
             except Exception as e:
-                print(f"列出目录失败: {e}")
+                logger.debug("列出目录失败: %s", e)
             return None
     
     def merge_images_fast(self, images, output_path, output_format, quality, task):
-        """快速合并图像"""
+        """快速合并图像
+        
+        合并过程中会逐页释放 images 中已粘贴的页面，峰值内存约为画布加剩余页面。
+        """
         if not images:
             return None
         
@@ -634,13 +861,16 @@ class ParallelFile2LongImageApp:
         y_offset = 0
         
         for i, img in enumerate(images):
-            # 检查取消
-            if task.cancel_event.is_set():
+            # 检查取消（普通布尔读取，每32页检查一次）
+            if (i & 31) == 0 and task.cancelled:
                 return None
             
             x_offset = (max_width - img.width) // 2
             merged_image.paste(img, (x_offset, y_offset))
             y_offset += img.height
+            # 粘贴后立即释放该页，不再等到整个列表被回收
+            img.close()
+            images[i] = img = None
             
             # 更新进度
             progress = 70 + (i + 1) / len(images) * 20
@@ -651,7 +881,7 @@ class ParallelFile2LongImageApp:
         
         total_pixels = max_width * total_height
         if output_format == "JPG":
-            merged_image = merged_image.convert("RGB")
+            # 画布本身就是RGB，无需 convert("RGB")（那会复制整张画布）
             if total_pixels > 10_000_000:
                 merged_image.save(output_path, format="JPEG", quality=quality, optimize=False)
             else:
@@ -660,22 +890,40 @@ class ParallelFile2LongImageApp:
             if total_pixels > 50_000_000:
                 merged_image.save(output_path, format="PNG", compress_level=1, optimize=False)
             else:
-                merged_image.save(output_path, format="PNG", compress_level=6, optimize=True)
+                merged_image.save(output_path, format="PNG", compress_level=3, optimize=False)
         
         return output_path
     
     def update_task_progress(self, task: FileTask, step: ConversionStep, progress: float):
         """更新任务进度"""
-        task.current_step = step.value
+        if task.current_step != step.value:
+            task.current_step = step.value
+            task.row_stale = True
         task.progress = progress
-        self.update_queue.put(('progress', task.task_id))
+        self._notify(task)
     
     def update_task_display(self, task_id: str):
-        """更新任务显示"""
+        """更新任务显示：仅进度变化时只改进度单元格，否则整行刷新
+
+        用时和速度随时间变化，仅进度变化时也至少每秒整行刷新一次。
+        """
         task = self.tasks.get(task_id)
         if not task:
             return
         
+        now = time.monotonic()
+        if task.row_stale or now - task.row_refreshed >= _ROW_REFRESH_INTERVAL:
+            # 先复位再取值，期间工作线程的新变化会在下一帧再次整行刷新
+            task.row_stale = False
+            task.row_refreshed = now
+            # 一次 item 调用同时写入列值和颜色标签
+            self.file_tree.item(task_id, values=self._compute_values(task),
+                                tags=_STATUS_TAGS.get(task.status, ()))
+        else:
+            self.file_tree.set(task_id, '进度', self._progress_text(task))
+    
+    def _compute_values(self, task: FileTask) -> tuple:
+        """计算任务在TreeView中各列的显示值"""
         # 计算用时
         elapsed = "-"
         elapsed_sec = 0
@@ -705,8 +953,8 @@ class ParallelFile2LongImageApp:
                 info_text = f"{task.progress/elapsed_sec:.1f}%/秒"
         elif task.status == FileStatus.COMPLETED:
             # 完成后：显示输出文件大小
-            if task.output_path and os.path.exists(task.output_path):
-                file_size = os.path.getsize(task.output_path)
+            if task.output_exists:
+                file_size = task.output_size
                 if file_size < 1024:
                     info_text = f"{file_size} B"
                 elif file_size < 1024 * 1024:
@@ -732,155 +980,139 @@ class ParallelFile2LongImageApp:
             # 取消：显示取消提示
             info_text = "已取消"
         
-        # 进度条文本
-        progress_text = f"{task.progress:.0f}%"
-        if task.progress > 0 and task.progress < 100:
-            bar_length = 10
-            filled = int(bar_length * task.progress / 100)
-            progress_text = '█' * filled + '░' * (bar_length - filled) + f" {task.progress:.0f}%"
-        
-        # 更新TreeView
-        self.file_tree.item(task_id, values=(
+        return (
             task.status.value,
-            progress_text,
+            self._progress_text(task),
             task.current_step,
             info_text,  # 动态信息
             elapsed
-        ))
-        
-        # 根据状态设置颜色
-        if task.status == FileStatus.COMPLETED:
-            self.file_tree.item(task_id, tags=('completed',))
-        elif task.status == FileStatus.FAILED:
-            self.file_tree.item(task_id, tags=('failed',))
-        elif task.status == FileStatus.PROCESSING:
-            self.file_tree.item(task_id, tags=('processing',))
-        
-        # 配置标签颜色
-        self.file_tree.tag_configure('completed', foreground='green')
-        self.file_tree.tag_configure('failed', foreground='red')
-        self.file_tree.tag_configure('processing', foreground='blue')
+        )
+    
+    @staticmethod
+    def _progress_text(task: FileTask) -> str:
+        """进度条文本"""
+        progress = task.progress
+        index = max(0, min(100, round(progress)))
+        return _BAR_STR[index] if 0 < progress < 100 else _PCT_STR[index]
+    
+    def _bulk_transition(self, task_ids, transition_fn):
+        """对 task_ids 中的任务执行状态转换，并统一刷新成功转换的行"""
+        if not task_ids:
+            return
+        touched = []
+        for task_id in list(task_ids):
+            task = self.tasks.get(task_id)
+            if task and transition_fn(task):
+                touched.append(task_id)
+        for task_id in touched:
+            self._mark_dirty(task_id)
+    
+    def _do_pause(self, task: FileTask) -> bool:
+        """暂停单个任务"""
+        if not self._transition(task, FileStatus.PAUSED):
+            return False
+        task.pause()
+        return True
+    
+    def _do_cancel(self, task: FileTask) -> bool:
+        """取消单个任务"""
+        if not self._transition(task, FileStatus.CANCELLED):
+            return False
+        task.cancelled = True
+        # 仍在线程池队列中的任务直接移出队列；已在运行的才需要通知工作线程
+        if not (task.future and task.future.cancel()):
+            task.resume()  # 解除暂停以便退出
+        return True
+    
+    def _do_retry(self, task: FileTask) -> bool:
+        """重置失败的任务并重新开始"""
+        if not self._transition(task, FileStatus.PENDING):
+            return False
+        task.progress = 0
+        task.error_message = ""
+        task.current_step = ""
+        task.start_time = None
+        task.end_time = None
+        self.start_task(task.task_id)
+        return True
     
     def pause_selected(self):
         """暂停选中的任务"""
-        selected = self.file_tree.selection()
-        for task_id in selected:
-            task = self.tasks.get(task_id)
-            if task and task.status == FileStatus.PROCESSING:
-                task.pause_event.clear()
-                task.status = FileStatus.PAUSED
-                self.update_task_display(task_id)
+        self._bulk_transition(self.file_tree.selection(), self._do_pause)
     
     def pause_all(self):
         """暂停所有任务"""
-        for task_id, task in self.tasks.items():
-            if task.status == FileStatus.PROCESSING:
-                task.pause_event.clear()
-                task.status = FileStatus.PAUSED
-                self.update_task_display(task_id)
+        self._bulk_transition(self._by_status[FileStatus.PROCESSING], self._do_pause)
     
     def cancel_selected(self):
         """取消选中的任务"""
-        selected = self.file_tree.selection()
-        for task_id in selected:
-            task = self.tasks.get(task_id)
-            if task and task.status in [FileStatus.PROCESSING, FileStatus.PAUSED]:
-                task.cancel_event.set()
-                task.pause_event.set()  # 解除暂停以便退出
-                if task.future:
-                    task.future.cancel()
-                task.status = FileStatus.CANCELLED
-                self.update_task_display(task_id)
+        self._bulk_transition(self.file_tree.selection(), self._do_cancel)
     
     def cancel_all(self):
         """取消所有任务"""
-        for task_id, task in self.tasks.items():
-            if task.status in [FileStatus.PROCESSING, FileStatus.PAUSED]:
-                task.cancel_event.set()
-                task.pause_event.set()
-                if task.future:
-                    task.future.cancel()
-                task.status = FileStatus.CANCELLED
-                self.update_task_display(task_id)
+        active = (list(self._by_status[FileStatus.PROCESSING]) +
+                  list(self._by_status[FileStatus.PAUSED]))
+        self._bulk_transition(active, self._do_cancel)
     
     def remove_selected(self):
         """删除选中的任务"""
         selected = self.file_tree.selection()
         for task_id in selected:
             task = self.tasks.get(task_id)
-            if task and task.status not in [FileStatus.PROCESSING]:
+            if task and task.status is not FileStatus.PROCESSING:
                 self.file_tree.delete(task_id)
-                del self.tasks[task_id]
+                with task.lock:
+                    self._by_status[task.status].pop(task_id, None)
+                    del self.tasks[task_id]
     
     def clear_completed(self):
         """清空已完成的任务"""
-        to_remove = []
-        for task_id, task in self.tasks.items():
-            if task.status in [FileStatus.COMPLETED, FileStatus.FAILED, FileStatus.CANCELLED]:
-                to_remove.append(task_id)
-        
-        for task_id in to_remove:
-            self.file_tree.delete(task_id)
-            del self.tasks[task_id]
+        for status in (FileStatus.COMPLETED, FileStatus.FAILED, FileStatus.CANCELLED):
+            bucket = self._by_status[status]
+            for task_id in list(bucket):
+                bucket.pop(task_id, None)
+                self.file_tree.delete(task_id)
+                del self.tasks[task_id]
     
     def open_output(self):
         """打开输出文件"""
         selected = self.file_tree.selection()
         if selected:
             task = self.tasks.get(selected[0])
-            if task and task.output_path and os.path.exists(task.output_path):
-                if sys.platform == 'darwin':
-                    subprocess.run(['open', task.output_path])
-                elif sys.platform == 'win32':
-                    os.startfile(task.output_path)
-                else:  # Linux
-                    subprocess.run(['xdg-open', task.output_path])
+            if task and task.output_exists:
+                _open(task.output_path)
     
     def reveal_in_finder(self):
         """在Finder中显示文件"""
         selected = self.file_tree.selection()
         if selected:
             task = self.tasks.get(selected[0])
-            if task and task.output_path and os.path.exists(task.output_path):
-                if sys.platform == 'darwin':
-                    # macOS: 使用 open -R 在Finder中显示并选中文件
-                    subprocess.run(['open', '-R', task.output_path])
-                elif sys.platform == 'win32':
-                    # Windows: 使用 explorer /select
-                    subprocess.run(['explorer', '/select,', task.output_path])
-                else:  # Linux
-                    # Linux: 打开包含文件的目录
-                    parent_dir = os.path.dirname(task.output_path)
-                    subprocess.run(['xdg-open', parent_dir])
-            else:
+            if task and task.output_exists:
+                _reveal(task.output_path)
+            elif task and task.file_path and os.path.exists(task.file_path):
                 # 如果输出文件不存在，显示原始文件
-                if task and task.file_path and os.path.exists(task.file_path):
-                    if sys.platform == 'darwin':
-                        subprocess.run(['open', '-R', task.file_path])
-                    elif sys.platform == 'win32':
-                        subprocess.run(['explorer', '/select,', task.file_path])
-                    else:
-                        parent_dir = os.path.dirname(task.file_path)
-                        subprocess.run(['xdg-open', parent_dir])
+                _reveal(task.file_path)
     
     def open_output_folder(self):
         """打开输出文件夹"""
         if os.path.exists(OUTPUT_DIR):
-            if sys.platform == 'darwin':
-                subprocess.run(['open', OUTPUT_DIR])
-            elif sys.platform == 'win32':
-                os.startfile(OUTPUT_DIR)
-            else:  # Linux
-                subprocess.run(['xdg-open', OUTPUT_DIR])
+            _open(OUTPUT_DIR)
     
     def update_max_workers(self):
         """更新最大并发数"""
         new_max = self.workers_var.get()
-        if new_max != self.max_workers:
-            # 关闭旧的执行器
-            self.executor.shutdown(wait=False)
-            # 创建新的执行器
-            self.executor = ThreadPoolExecutor(max_workers=new_max)
+        delta = new_max - self.max_workers
+        if delta > 0:
+            # 增加并发：直接释放额外的槽位
+            for _ in range(delta):
+                self._slots.release()
+        elif delta < 0:
+            # 减少并发：在后台等待正在运行的任务让出槽位后收回，不影响已提交的任务
+            def shrink(count=-delta):
+                for _ in range(count):
+                    self._slots.acquire()
+            threading.Thread(target=shrink, daemon=True).start()
+        if delta:
             self.max_workers = new_max
             self.update_status(f"并发数已更新为 {new_max}")
     
@@ -892,18 +1124,57 @@ class ParallelFile2LongImageApp:
             self.quality_frame.pack_forget()
     
     def start_ui_updater(self):
-        """启动UI更新器"""
-        def updater():
+        """启动UI更新器（后台线程阻塞等待，空闲时不唤醒Tk）"""
+        threading.Thread(target=self._drain_updates, daemon=True).start()
+    
+    def _notify(self, task: FileTask):
+        """工作线程：通知UI任务有变化。已登记未取走的任务直接返回，不加锁"""
+        if task.dirty:
+            return
+        with self._pending_lock:
+            task.dirty = True
+            self._pending.append(task)
+        self._has_dirty.set()
+    
+    def _drain_updates(self):
+        """后台线程：等待刷新通知，把一批任务交给UI线程刷新"""
+        while True:
+            self._has_dirty.wait()
+            if self._closing:  # 退出信号
+                return
+            
+            # 在锁内取走整批并复位 dirty；之后的通知会进入下一批并重新 set 事件
+            with self._pending_lock:
+                self._has_dirty.clear()
+                pending, self._pending = self._pending, []
+                for task in pending:
+                    task.dirty = False
+            
             try:
-                while True:
-                    action, task_id = self.update_queue.get_nowait()
-                    self.update_task_display(task_id)
-            except queue.Empty:
-                pass
-            finally:
-                self.root.after(100, updater)
-        
-        updater()
+                self.root.after_idle(self._flush_updates, tuple(t.task_id for t in pending))
+            except RuntimeError:
+                return  # 主循环已结束
+    
+    def _flush_updates(self, task_ids):
+        """UI线程：接收后台线程合并的一批任务"""
+        for task_id in task_ids:
+            self._mark_dirty(task_id)
+    
+    def _mark_dirty(self, task_id: str):
+        """标记任务需要刷新，每帧（60ms）最多刷新一次"""
+        self._dirty.add(task_id)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after(60, self._flush_dirty)
+    
+    def _flush_dirty(self):
+        """UI线程：批量刷新本帧内所有脏任务行"""
+        dirty, self._dirty = self._dirty, set()
+        self._flush_scheduled = False
+        for task_id in dirty:
+            self.update_task_display(task_id)
+        # 所有行更新完毕后统一重绘一次
+        self.root.update_idletasks()
     
     def update_status(self, message):
         """更新状态栏"""
@@ -944,12 +1215,17 @@ class ParallelFile2LongImageApp:
             if task and task.status == FileStatus.FAILED:
                 self.show_error_detail_for_task(task)
     
-    def show_error_detail_for_task(self, task: 'FileTask'):
-        """显示任务的错误详情窗口"""
-        # 创建错误详情窗口
+    def setup_error_window(self):
+        """预先创建（隐藏的）错误详情窗口，之后每次查看只刷新内容"""
+        self._err_task: Optional[FileTask] = None
+        
         error_window = tk.Toplevel(self.root)
+        error_window.withdraw()
         error_window.title("错误详情")
         error_window.geometry("600x400")
+        error_window.transient(self.root)
+        error_window.protocol("WM_DELETE_WINDOW", self._hide_error_window)
+        self._err_win = error_window
         
         # 主框架
         main_frame = ttk.Frame(error_window, padding="20")
@@ -964,13 +1240,9 @@ class ParallelFile2LongImageApp:
         info_frame = ttk.LabelFrame(main_frame, text="文件信息", padding="10")
         info_frame.pack(fill='x', pady=(0, 10))
         
-        ttk.Label(info_frame, text=f"文件名: {task.file_name}").pack(anchor='w')
-        ttk.Label(info_frame, text=f"路径: {task.file_path}").pack(anchor='w')
-        ttk.Label(info_frame, text=f"失败步骤: {task.current_step}").pack(anchor='w')
-        
-        if task.start_time and task.end_time:
-            duration = task.end_time - task.start_time
-            ttk.Label(info_frame, text=f"耗时: {duration:.1f} 秒").pack(anchor='w')
+        # 文件名/路径/步骤/耗时合并为一个多行标签
+        self._err_info_label = ttk.Label(info_frame, justify='left')
+        self._err_info_label.pack(anchor='w')
         
         # 错误信息
         error_frame = ttk.LabelFrame(main_frame, text="错误信息", padding="10")
@@ -988,149 +1260,147 @@ class ParallelFile2LongImageApp:
         error_text.pack(side='left', fill='both', expand=True)
         scrollbar.config(command=error_text.yview)
         
-        # 插入详细错误日志
-        if task.error_log:
-            # 使用详细日志
-            log_content = ErrorLogger.format_log_for_display(task.error_log)
-            error_text.insert('1.0', log_content)
-        else:
-            # 备用：仅显示简单错误信息
-            error_msg = task.error_message or "未知错误"
-            error_text.insert('1.0', error_msg)
-            
-            # 分析错误并提供建议
-            suggestions = self.analyze_error(error_msg)
-            if suggestions:
-                error_text.insert('end', '\n\n💡 可能的解决方案:\n')
-                for suggestion in suggestions:
-                    error_text.insert('end', f'• {suggestion}\n')
-        
         # 设置文本框样式
         error_text.tag_configure('header', font=('Helvetica', 11, 'bold'))
         error_text.tag_configure('error', foreground='red')
         error_text.config(state='disabled')  # 设为只读
+        self._err_text = error_text
         
         # 按钮框架
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill='x')
         
-        # 复制错误信息按钮
-        def copy_error():
-            self.root.clipboard_clear()
-            if task.error_log:
-                # 复制Markdown格式（方便GitHub Issue）
-                clipboard_content = ErrorLogger.format_log_for_clipboard(task.error_log)
-            else:
-                clipboard_content = f"文件: {task.file_name}\n错误: {task.error_message}"
-            self.root.clipboard_append(clipboard_content)
-            messagebox.showinfo("复制成功", "详细日志已复制到剪贴板\n可直接粘贴到GitHub Issue或邮件中")
-        
         ttk.Button(button_frame, text="📋 复制详细日志", 
-                  command=copy_error).pack(side='left', padx=5)
-        
-        # 打开日志文件按钮
-        def open_log_file():
-            if task.error_log:
-                log_file = f"logs/error_{task.error_log.log_id}.log"
-                if os.path.exists(log_file):
-                    if sys.platform == 'darwin':
-                        subprocess.run(['open', log_file])
-                    elif sys.platform == 'win32':
-                        os.startfile(log_file)
-                    else:
-                        subprocess.run(['xdg-open', log_file])
+                  command=self._copy_error).pack(side='left', padx=5)
         
-        if task.error_log:
-            ttk.Button(button_frame, text="📄 打开日志文件", 
-                      command=open_log_file).pack(side='left', padx=5)
-        
-        # 重试按钮
-        def retry():
-            error_window.destroy()
-            # 重置任务状态
-            task.status = FileStatus.PENDING
-            task.progress = 0
-            task.error_message = ""
-            task.current_step = ""
-            task.start_time = None
-            task.end_time = None
-            self.update_task_display(task.task_id)
-            # 重新开始
-            self.start_task(task.task_id)
-        
-        ttk.Button(button_frame, text="🔄 重试转换", 
-                  command=retry).pack(side='left', padx=5)
+        # 打开日志文件按钮（仅有详细日志时显示）
+        self._err_log_btn = ttk.Button(button_frame, text="📄 打开日志文件", 
+                                       command=self._open_error_log)
+        
+        self._err_retry_btn = ttk.Button(button_frame, text="🔄 重试转换", 
+                                         command=self._retry_error_task)
+        self._err_retry_btn.pack(side='left', padx=5)
         
         # 关闭按钮
         ttk.Button(button_frame, text="关闭", 
-                  command=error_window.destroy).pack(side='right', padx=5)
-        
-        # 使窗口居中
-        error_window.transient(self.root)
-        error_window.grab_set()
+                  command=self._hide_error_window).pack(side='right', padx=5)
     
-    def analyze_error(self, error_msg: str) -> list:
-        """分析错误信息并提供解决建议"""
-        suggestions = []
-        error_lower = error_msg.lower()
-        
-        if "libreoffice" in error_lower:
-            suggestions.append("安装 LibreOffice: brew install --cask libreoffice")
-            suggestions.append("确保 LibreOffice 路径正确配置")
-        elif "poppler" in error_lower:
-            suggestions.append("安装 Poppler: brew install poppler")
-            suggestions.append("检查 Poppler 路径配置")
-        elif "permission" in error_lower or "权限" in error_msg:
-            suggestions.append("检查文件读取权限")
-            suggestions.append("确保输出目录有写入权限")
-        elif "memory" in error_lower or "内存" in error_msg:
-            suggestions.append("降低 DPI 设置")
-            suggestions.append("关闭其他应用释放内存")
-            suggestions.append("分批处理大文件")
-        elif "timeout" in error_lower or "超时" in error_msg:
-            suggestions.append("增加超时时间设置")
-            suggestions.append("检查网络连接（如果涉及网络资源）")
-        elif "corrupt" in error_lower or "损坏" in error_msg:
-            suggestions.append("文件可能已损坏，尝试修复或使用其他工具打开")
-            suggestions.append("检查文件是否完整下载")
-        elif "not found" in error_lower or "找不到" in error_msg:
-            suggestions.append("确认文件路径正确")
-            suggestions.append("检查文件是否被移动或删除")
+    def show_error_detail_for_task(self, task: 'FileTask'):
+        """显示任务的错误详情窗口"""
+        self._err_task = task
+        
+        # 文件信息
+        info = [f"文件名: {task.file_name}",
+                f"路径: {task.file_path}",
+                f"失败步骤: {task.current_step}"]
+        if task.start_time and task.end_time:
+            duration = task.end_time - task.start_time
+            info.append(f"耗时: {duration:.1f} 秒")
+        self._err_info_label.config(text='\n'.join(info))
+        
+        # 错误内容先在 Python 中拼好，一次 insert 写入
+        if task.error_log:
+            # 使用详细日志
+            content = task.display_log()
+        else:
+            # 备用：仅显示简单错误信息，并分析错误提供建议
+            error_msg = task.error_message or "未知错误"
+            parts = [error_msg]
+            suggestions = self.analyze_error(error_msg)
+            if suggestions:
+                parts.append('\n\n💡 可能的解决方案:\n')
+                parts.extend(f'• {suggestion}\n' for suggestion in suggestions)
+            content = ''.join(parts)
+        
+        error_text = self._err_text
+        error_text.config(state='normal')
+        error_text.delete('1.0', 'end')
+        error_text.insert('1.0', content)
+        error_text.config(state='disabled')
+        
+        if task.error_log:
+            self._err_log_btn.pack(side='left', padx=5, before=self._err_retry_btn)
         else:
-            suggestions.append("检查文件格式是否支持")
-            suggestions.append("尝试降低转换质量或DPI")
-            suggestions.append("查看系统日志获取更多信息")
+            self._err_log_btn.pack_forget()
         
-        return suggestions
+        # 非模态：查看详情时仍可操作主窗口（例如逐个查看其他失败任务）
+        self._err_win.deiconify()
+        self._err_win.lift()
+    
+    def _hide_error_window(self):
+        """隐藏错误详情窗口（窗口本身保留复用）"""
+        self._err_win.withdraw()
+        self._err_task = None
+    
+    def _copy_error(self):
+        """复制当前错误详情到剪贴板"""
+        task = self._err_task
+        if task is None:
+            return
+        if task.error_log:
+            # 复制Markdown格式（方便GitHub Issue）
+            clipboard_content = task.clipboard_log()
+        else:
+            clipboard_content = f"文件: {task.file_name}\n错误: {task.error_message}"
+        self.root.clipboard_clear()
+        self.root.clipboard_append(clipboard_content)
+        self._toast("详细日志已复制到剪贴板，可直接粘贴到GitHub Issue或邮件中")
+    
+    def _toast(self, msg: str, ms: int = 1500):
+        """在鼠标附近显示自动消失的提示（不阻塞主循环）"""
+        toast = tk.Toplevel(self.root)
+        toast.overrideredirect(True)
+        tk.Label(toast, text=msg, padx=10, pady=6, bg='#333333', fg='white').pack()
+        toast.geometry(f"+{self.root.winfo_pointerx()}+{self.root.winfo_pointery() + 16}")
+        toast.after(ms, toast.destroy)
+    
+    def _open_error_log(self):
+        """打开当前任务的错误日志文件"""
+        task = self._err_task
+        if task and task.log_file:
+            _open(task.log_file)
+    
+    def _retry_error_task(self):
+        """重试当前错误详情中的任务"""
+        task = self._err_task
+        self._hide_error_window()
+        if task:
+            # 重置任务状态并重新开始
+            self._bulk_transition((task.task_id,), self._do_retry)
+    
+    def analyze_error(self, error_msg: str) -> tuple:
+        """分析错误信息并提供解决建议"""
+        found = {_ERR_GROUPS[m.lower()] for m in _ERR_PATTERN.findall(error_msg)}
+        for group in _ERR_PRIORITY:
+            if group in found:
+                return _ERR_SUGGESTIONS[group]
+        return _DEFAULT_SUGGESTIONS
     
     def retry_selected(self):
         """重试选中的失败任务"""
-        selected = self.file_tree.selection()
-        for task_id in selected:
-            task = self.tasks.get(task_id)
-            if task and task.status == FileStatus.FAILED:
-                # 重置任务状态
-                task.status = FileStatus.PENDING
-                task.progress = 0
-                task.error_message = ""
-                task.current_step = ""
-                task.start_time = None
-                task.end_time = None
-                self.update_task_display(task_id)
-                # 重新开始
-                self.start_task(task_id)
+        self._bulk_transition(self.file_tree.selection(), self._do_retry)
     
     def quit_app(self):
         """退出应用"""
         # 取消所有任务
         self.cancel_all()
-        # 关闭执行器
-        self.executor.shutdown(wait=False)
+        # 通知UI更新线程退出
+        self._closing = True
+        self._has_dirty.set()
+        # 关闭执行器：丢弃尚未开始的排队任务，避免退出时逐个等待
+        if sys.version_info >= (3, 9):
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            self.executor.shutdown(wait=False)
         # 退出
         self.root.quit()
 
 def main():
     """主函数"""
+    # 默认只输出 INFO 及以上日志，调试信息在 logger.debug 内部即被过滤
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    
     # 创建输出目录
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     os.makedirs(INTERMEDIATE_DIR, exist_ok=True)
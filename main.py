@@ -1,12 +1,13 @@
 import os
-import pdf2image
 import streamlit as st
 from PIL import Image
 import time
 import subprocess
-import sys
 import hashlib
-from config import OUTPUT_DIR, POPPLER_PATH, LIBREOFFICE_PATH, INTERMEDIATE_DIR
+from config import OUTPUT_DIR, LIBREOFFICE_PATH, INTERMEDIATE_DIR, SUBPROCESS_FLAGS
+from pdf_renderer import open_pages, detect_mode, clamp_dpi
+from image_writer import merge_pages
+import output_cache
 
 # 增加 PIL 的最大图像像素限制，防止 DecompressionBombWarning
 Image.MAX_IMAGE_PIXELS = 500000000  # 5亿像素
@@ -17,25 +18,20 @@ def get_file_hash(file_content):
     """计算文件内容的哈希值，用于识别文件是否已处理"""
     return hashlib.md5(file_content).hexdigest()
 
-def merge_images(images, output_path, output_format="PNG", quality=85):
-    """合并图像并返回实际保存的文件路径"""
+def merge_images(sizes, pages, output_path, output_format="PNG", quality=85, mode='RGB'):
+    """合并图像并返回实际保存的文件路径列表
+
+    sizes 为各页尺寸，用于预先确定输出尺寸；pages 逐页交出图像，
+    每页用完立即释放，任意时刻只持有一页。PNG 逐页直接编码写出，不分配整张画布。
+    总高度超过 MAX_TILE_HEIGHT 时按页边界拆成多张（名称_1、名称_2 …）。
+    """
     st.write("开始合并图像...")
     progress_bar = st.progress(0)
     status_text = st.empty()
     start_time = time.time()
+    total_images = len(sizes)
 
-    widths, heights = zip(*(i.size for i in images))
-    total_height = sum(heights)
-    max_width = max(widths)
-
-    merged_image = Image.new('RGB', (max_width, total_height))
-    y_offset = 0
-
-    total_images = len(images)
-    for idx, img in enumerate(images):
-        merged_image.paste(img, (0, y_offset))
-        y_offset += img.height
-
+    def report_page(idx):
         # 更新进度
         progress = (idx + 1) / total_images
         progress_bar.progress(progress)
@@ -44,45 +40,45 @@ def merge_images(images, output_path, output_format="PNG", quality=85):
         remaining_time = estimated_total_time - elapsed_time
         status_text.text(f"正在合并图像：{idx + 1}/{total_images}，预计剩余时间：{int(remaining_time)}秒")
 
-    # 保存并压缩图像
-    if output_format == "JPG":
-        merged_image = merged_image.convert("RGB")  # 确保是 RGB 模式
-        try:
-            merged_image.save(output_path, format="JPEG", quality=quality)
-        except (OSError, IOError) as e:
-            if "encoder error" in str(e).lower():
-                # 如果 JPEG 保存失败，尝试使用不同的参数或降级保存
-                st.warning("JPEG 编码出现问题，尝试其他保存方式...")
-                try:
-                    # 尝试使用较低的质量设置和不同的子采样
-                    merged_image.save(output_path, format="JPEG", quality=min(quality, 85), 
-                                    optimize=False, progressive=False, subsampling=2)
-                except:
-                    # 如果仍然失败，改为保存为 PNG
-                    st.warning("JPEG 保存失败，改为保存为 PNG 格式")
-                    output_path = output_path.replace('.jpg', '.png')
-                    merged_image.save(output_path, format="PNG", optimize=True)
-            else:
-                raise
-    else:
-        merged_image.save(output_path, format="PNG", optimize=True)
-        
+    # 与原画布一致：左对齐，空白处为黑色
+    output_paths = merge_pages(sizes, pages, output_path, output_format, quality, mode,
+                               background='black', center=False,
+                               on_page=report_page, warn=st.warning)
+
     status_text.text("图像合并并压缩完成！")
     progress_bar.progress(1.0)
-    return output_path  # 返回实际保存的文件路径
+    return output_paths
+
+def effective_dpi(pdf_path, dpi):
+    """按单页像素上限限制渲染 DPI，降低时提示用户"""
+    render_dpi = clamp_dpi(pdf_path, dpi)
+    if render_dpi < dpi:
+        st.warning(f"页面尺寸过大，DPI 已自动从 {dpi} 降至 {render_dpi}")
+    return render_dpi
 
 def convert_to_image(file_path, output_dir, dpi, output_format="PNG", quality=85):
-    """转换文件为图像并返回实际保存的文件路径"""
+    """转换文件为图像并返回实际保存的文件路径列表（超长文档会拆成多张）"""
     st.write("开始转换文件...")
     progress_bar = st.progress(0)
     status_text = st.empty()
     start_time = time.time()
 
-    images = []
+    sizes, pages, mode = [], iter(()), 'RGB'
     base_name = os.path.splitext(os.path.basename(file_path))[0]
+    merged_output_path = os.path.join(output_dir, f"{base_name}.{output_format.lower()}")
+
+    # 相同内容、相同参数已转换过时直接复用缓存的输出
+    cache_key = output_cache.cache_key(file_path, dpi, output_format, quality,
+                                       background='black', center=False)
+    cached_output_paths = output_cache.fetch(cache_key, merged_output_path)
+    if cached_output_paths:
+        progress_bar.progress(1.0)
+        status_text.text("使用缓存结果，文件转换完成！")
+        return cached_output_paths
 
     if file_path.lower().endswith('.pdf'):
-        images = pdf2image.convert_from_path(file_path, poppler_path=POPPLER_PATH, dpi=dpi)
+        mode = detect_mode(file_path)
+        sizes, pages = open_pages(file_path, effective_dpi(file_path, dpi), mode=mode)
         progress_bar.progress(0.3)
     elif file_path.lower().endswith((".doc", ".docx", ".ppt", ".pptx", ".csv", ".xls", ".xlsx", ".odt", ".rtf", ".txt", ".psd", ".cdr", ".wps", ".svg")):
         if LIBREOFFICE_PATH is None:
@@ -92,12 +88,10 @@ def convert_to_image(file_path, output_dir, dpi, output_format="PNG", quality=85
                            "2. 或使用 Homebrew: brew install --cask libreoffice")
         
         pdf_path = os.path.join(output_dir, f"{base_name}.pdf")
-        if sys.platform.startswith('win'):
-            conversion_cmd = f'"{LIBREOFFICE_PATH}" --headless --convert-to pdf "{file_path}" --outdir "{output_dir}"'
-        else:
-            conversion_cmd = f'{LIBREOFFICE_PATH} --headless --convert-to pdf "{file_path}" --outdir "{output_dir}"'
-        
-        subprocess.run(conversion_cmd, shell=True, capture_output=True)
+        # 以参数列表直接启动，不经过 shell，文件名中的空格和引号无需转义
+        conversion_cmd = [LIBREOFFICE_PATH, '--headless', '--convert-to', 'pdf',
+                          file_path, '--outdir', output_dir]
+        subprocess.run(conversion_cmd, capture_output=True, creationflags=SUBPROCESS_FLAGS)
 
         if not os.path.exists(pdf_path):
             raise ValueError("文件转换为 PDF 失败")
@@ -105,17 +99,21 @@ def convert_to_image(file_path, output_dir, dpi, output_format="PNG", quality=85
             status_text.text(f"文件转换为 PDF 成功，正在转换为图像: {pdf_path}")
             progress_bar.progress(0.6)
 
-        images = pdf2image.convert_from_path(pdf_path, poppler_path=POPPLER_PATH, dpi=dpi)
+        mode = detect_mode(pdf_path)
+        sizes, pages = open_pages(pdf_path, effective_dpi(pdf_path, dpi), mode=mode)
         progress_bar.progress(0.9)
     else:
         raise ValueError("不支持的文件格式")
 
-    if images:
-        merged_output_path = os.path.join(output_dir, f"{base_name}.{output_format.lower()}")
-        actual_output_path = merge_images(images, merged_output_path, output_format, quality)
+    if sizes:
+        output_paths = merge_images(sizes, pages, merged_output_path, output_format, quality, mode)
+        try:
+            output_cache.store(cache_key, output_paths)
+        except OSError:
+            pass  # 缓存写入失败不影响本次转换结果
         progress_bar.progress(1.0)
         status_text.text("文件转换完成！")
-        return actual_output_path  # 返回实际保存的文件路径
+        return output_paths  # 返回实际保存的文件路径
     return None
 
 # 初始化 session state
@@ -149,7 +147,7 @@ if uploaded_file is not None:
     # 检查是否已经处理过相同的文件和参数
     if conversion_key in st.session_state.processed_files:
         # 使用缓存的结果
-        actual_output_path = st.session_state.processed_files[conversion_key]
+        output_paths = st.session_state.processed_files[conversion_key]
         st.success("使用缓存的转换结果")
     else:
         # 保存上传的文件到临时目录
@@ -159,21 +157,34 @@ if uploaded_file is not None:
         
         try:
             # 执行转换
-            actual_output_path = convert_to_image(temp_file_path, OUTPUT_DIR, dpi, output_format, quality)
+            output_paths = convert_to_image(temp_file_path, OUTPUT_DIR, dpi, output_format, quality)
             
             # 缓存结果
-            if actual_output_path:
-                st.session_state.processed_files[conversion_key] = actual_output_path
+            if output_paths:
+                st.session_state.processed_files[conversion_key] = output_paths
         finally:
             # 清理临时文件
             if os.path.exists(temp_file_path):
                 os.remove(temp_file_path)
     
     # 显示结果 - 使用优化的显示方案
-    if actual_output_path and os.path.exists(actual_output_path):
+    if output_paths and all(os.path.exists(p) for p in output_paths):
         # 导入优化的显示模块
         from optimized_display import integrate_optimized_display
-        integrate_optimized_display(actual_output_path, output_format, dpi, quality)
+        integrate_optimized_display(output_paths[0], output_format, dpi, quality)
+        
+        # 超长文档拆成了多张：其余分块提供单独下载
+        if len(output_paths) > 1:
+            st.info(f"文档过长，已按页拆分为 {len(output_paths)} 张图片，上方为第 1 张")
+            for part in output_paths[1:]:
+                with open(part, "rb") as file:
+                    st.download_button(
+                        label=f"下载 {os.path.basename(part)}",
+                        data=file.read(),
+                        file_name=os.path.basename(part),
+                        mime=f"image/{os.path.splitext(part)[1][1:].replace('jpg', 'jpeg')}",
+                        key=f"download_part_{part}"
+                    )
     else:
         st.error("图像转换失败，请检查文件格式或系统依赖")
 
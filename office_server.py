@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+常驻 LibreOffice 转换服务
+安装了 unoserver 时，启动一个常驻的 soffice，之后每个文件通过 unoconvert 转换，
+省去每次启动 soffice、加载字体缓存的开销；服务不可用时调用方回退到逐个启动 soffice
+"""
+
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+from config import INTERMEDIATE_DIR, LIBREOFFICE_PATH, SUBPROCESS_FLAGS
+
+
+def _free_port() -> int:
+    """向系统申请一个当前空闲的本地端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class OfficeServer:
+    """unoserver 进程的启动、健康检查与退出清理"""
+
+    HOST = "127.0.0.1"
+
+    def __init__(self):
+        self.process: Optional[subprocess.Popen] = None
+        self.port = None
+        self._unoconvert = shutil.which("unoconvert")
+
+    def start(self) -> bool:
+        """在后台启动服务（不等待就绪），不满足条件时返回 False"""
+        unoserver = shutil.which("unoserver")
+        if LIBREOFFICE_PATH is None or unoserver is None or self._unoconvert is None:
+            return False
+
+        # 使用独立的用户配置目录，否则用户已打开的 LibreOffice 会接管请求并使新进程直接退出
+        profile = Path(INTERMEDIATE_DIR, "lo_profile").resolve()
+        profile.mkdir(parents=True, exist_ok=True)
+        self.port = _free_port()
+        try:
+            self.process = subprocess.Popen(
+                [unoserver, "--executable", LIBREOFFICE_PATH,
+                 "--interface", self.HOST, "--port", str(self.port),
+                 "--uno-port", str(_free_port()),
+                 "--user-installation", profile.as_uri()],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS,
+            )
+        except OSError:
+            self.process = None
+            return False
+        atexit.register(self.stop)
+        return True
+
+    def ready(self) -> bool:
+        """服务进程仍在运行且端口可连接"""
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((self.HOST, self.port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+
+    def convert(self, file_path: str, pdf_path: str, timeout: float = 120) -> bool:
+        """把 file_path 转换为 pdf_path，服务不可用或转换失败时返回 False"""
+        if not self.ready():
+            return False
+        try:
+            result = subprocess.run(
+                [self._unoconvert, "--host", self.HOST, "--port", str(self.port),
+                 "--convert-to", "pdf", file_path, pdf_path],
+                capture_output=True, timeout=timeout, creationflags=SUBPROCESS_FLAGS,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0 and os.path.exists(pdf_path)
+
+    def stop(self):
+        """结束服务进程（退出时由 atexit 调用）"""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+转换结果缓存
+以 文件内容 + 转换参数 的 BLAKE2b 摘要为键，相同输入直接复用上次的输出；
+总大小超过 CACHE_MAX_BYTES 时淘汰最久未使用的结果
+"""
+
+import hashlib
+import os
+import shutil
+from typing import Dict, List, Tuple
+
+from config import INTERMEDIATE_DIR, CACHE_MAX_BYTES
+from image_writer import tile_paths
+from pdf_renderer import HAS_FITZ
+
+CACHE_DIR = os.path.join(INTERMEDIATE_DIR, "cache")
+_EXTS = (".png", ".jpg")
+_KEY_LEN = 32  # 十六进制键长度（16 字节摘要）
+# 渲染器不同，颜色模式检测与像素结果也可能不同
+_RENDERER = "fitz" if HAS_FITZ else "pdf2image"
+
+# (路径, 大小, 修改时间) → 内容摘要；文件未变化时无需重新读取内容
+_digest_by_stat: Dict[Tuple[str, int, int], str] = {}
+
+
+def _file_digest(file_path: str) -> str:
+    """文件内容摘要（按 stat 信息记忆）"""
+    st = os.stat(file_path)
+    stat_key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    digest = _digest_by_stat.get(stat_key)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = _digest_by_stat[stat_key] = h.hexdigest()
+    return digest
+
+
+def cache_key(file_path: str, dpi: int, output_format: str, quality,
+              background='white', center: bool = True) -> str:
+    """计算缓存键：内容摘要 + 影响输出的转换参数
+
+    background / center 与传给 merge_pages 的版式参数一致，
+    不同界面（版式不同）的输出不会互相复用。
+    """
+    params = (f"{_file_digest(file_path)}|{dpi}|{output_format}|{quality}|"
+              f"{background}|{center}|{_RENDERER}").encode()
+    return hashlib.blake2b(params, digest_size=16).hexdigest()
+
+
+def _cached_path(key: str, index: int, count: int, ext: str) -> str:
+    """缓存文件路径：单张为 键.ext，分块时为 键-序号.ext"""
+    name = key if count == 1 else f"{key}-{index}"
+    return os.path.join(CACHE_DIR, name + ext)
+
+
+def _find(key: str, index: int, count: int):
+    """按支持的扩展名查找一个缓存文件，没有则返回 None"""
+    for ext in _EXTS:
+        path = _cached_path(key, index, count, ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def lookup(key: str) -> List[str]:
+    """返回缓存的输出文件路径（分块时按顺序），未命中返回空列表"""
+    single = _find(key, 1, 1)
+    if single:
+        return [single]
+    parts = []
+    part = _find(key, 1, 0)
+    while part:
+        parts.append(part)
+        part = _find(key, len(parts) + 1, 0)
+    return parts
+
+
+def _copy_replace(src: str, dst: str):
+    """复制为临时文件后改名替换 dst：只替换目录项，不会写穿与 dst 共享的 inode"""
+    tmp = dst + ".tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def fetch(key: str, output_path: str) -> List[str]:
+    """命中时把缓存文件复制到 output_path（分块时为 名称_1 …，扩展名以缓存文件为准），返回实际路径"""
+    cached = lookup(key)
+    targets = []
+    for src, dst in zip(cached, tile_paths(output_path, len(cached))):
+        dst = os.path.splitext(dst)[0] + os.path.splitext(src)[1]
+        _copy_replace(src, dst)
+        os.utime(src)  # 记录最近使用时间，供淘汰时参考
+        targets.append(dst)
+    return targets
+
+
+def store(key: str, output_paths: List[str]):
+    """把新生成的输出加入缓存
+
+    存独立副本而不是硬链接：输出文件之后可能被原地覆盖写入，共享 inode 会连带改坏缓存。
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for index, output_path in enumerate(output_paths, 1):
+        _copy_replace(output_path, _cached_path(key, index, len(output_paths),
+                                                os.path.splitext(output_path)[1].lower()))
+    evict()
+
+
+def evict(max_bytes: int = CACHE_MAX_BYTES):
+    """按最近使用时间淘汰缓存，直到总大小不超过 max_bytes
+
+    同一个键的所有分块一起淘汰，不会留下缺块的结果。
+    """
+    groups: Dict[str, List] = {}  # 键 → [最近使用时间, 总大小, 文件路径...]
+    try:
+        entries = list(os.scandir(CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        group = groups.setdefault(entry.name[:_KEY_LEN], [0, 0])
+        group[0] = max(group[0], st.st_mtime)
+        group[1] += st.st_size
+        group.append(entry.path)
+
+    total = sum(group[1] for group in groups.values())
+    for group in sorted(groups.values()):
+        if total <= max_bytes:
+            break
+        for path in group[2:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= group[1]
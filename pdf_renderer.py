@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+PDF 页面渲染
+优先使用 PyMuPDF (fitz) 在进程内逐页渲染；未安装时回退到 pdf2image + Poppler
+"""
+
+import atexit
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+import pdf2image
+from pdf2image import pdfinfo_from_path
+from PIL import Image, ImageChops
+
+from config import POPPLER_PATH, MAX_PAGE_PIXELS
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+HAS_FITZ = fitz is not None
+
+# 多进程渲染时每个子任务的页数；任务小则首页出得快，同时在途的页数也少
+_CHUNK_PAGES = 2
+
+# 文档总像素超过该值才用多进程渲染（约 35 页 300 DPI 的 A4）。
+# 启动子进程（macOS 默认 spawn，需重新导入入口模块）要约 1 秒，普通文档逐页渲染更快
+_PARALLEL_PIXELS = 300_000_000
+
+# 多进程渲染共用的进程池：首次需要时创建，之后的文档复用，退出时结束
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# 灰度检测：以很低的分辨率预览每页，各通道差值都不超过容差即视为灰度
+_PROBE_DPI = 18
+_GRAY_TOLERANCE = 12
+_PROBE_PAGES = 5  # 最多抽查的页数（含首页和末页）
+
+
+def detect_mode(pdf_path: str) -> str:
+    """文档所有页面都是灰度时返回 'L'，否则返回 'RGB'
+
+    'L' 画布每像素 1 字节，内存、合并和编码的数据量都只有 RGB 的三分之一。
+    只抽查均匀分布的至多 _PROBE_PAGES 页（含首末页），检测开销与总页数无关；
+    只在 PyMuPDF 可用时检测，否则总是返回 'RGB'。
+    """
+    if not HAS_FITZ:
+        return 'RGB'
+    mat = fitz.Matrix(_PROBE_DPI / 72, _PROBE_DPI / 72)
+    with fitz.open(pdf_path) as doc:
+        last = doc.page_count - 1
+        probes = {last * i // (_PROBE_PAGES - 1) for i in range(_PROBE_PAGES)} if last >= 0 else ()
+        for index in sorted(probes):
+            pix = doc[index].get_pixmap(matrix=mat, alpha=False)
+            r, g, b = Image.frombytes("RGB", (pix.width, pix.height), pix.samples).split()
+            if (ImageChops.difference(r, g).getextrema()[1] > _GRAY_TOLERANCE or
+                    ImageChops.difference(g, b).getextrema()[1] > _GRAY_TOLERANCE):
+                return 'RGB'
+    return 'L'
+
+
+def clamp_dpi(pdf_path: str, dpi: int, budget: int = MAX_PAGE_PIXELS) -> int:
+    """按最大页面的面积限制 DPI，使单页像素数不超过 budget
+
+    海报、图纸一类的大幅面页面在高 DPI 下单页就可能需要数十 GB 内存。
+    无法读取页面尺寸时原样返回 dpi。
+    """
+    try:
+        if HAS_FITZ:
+            with fitz.open(pdf_path) as doc:
+                max_area = max((page.rect.width * page.rect.height for page in doc), default=0)
+        else:
+            # pdfinfo 只报告首页尺寸，形如 "595.276 x 841.89 pts (A4)"
+            width, _, height = pdfinfo_from_path(
+                pdf_path, poppler_path=POPPLER_PATH)["Page size"].split()[:3]
+            max_area = float(width) * float(height)
+    except Exception:
+        return dpi
+
+    pixels = max_area * (dpi / 72) ** 2
+    if pixels <= budget:
+        return dpi
+    return max(int(dpi * (budget / pixels) ** 0.5), 1)
+
+
+def _as_mode(pages: Iterator[Image.Image], mode: str) -> Iterator[Image.Image]:
+    """把逐页图像转换为指定模式"""
+    for img in pages:
+        if img.mode != mode:
+            converted = img.convert(mode)
+            img.close()
+            img = converted
+        yield img
+
+
+def _colorspace(mode: str):
+    """图像模式对应的 fitz 色彩空间"""
+    return fitz.csGRAY if mode == 'L' else fitz.csRGB
+
+
+def render_pages(pdf_path: str, dpi: int, mode: str = 'RGB') -> Iterator[Image.Image]:
+    """按页序逐页生成 mode（'RGB' 或 'L'）图像
+
+    fitz 直接在进程内光栅化，不需要启动 pdftoppm 子进程，
+    也没有中间 PPM 的编码/解码；每页渲染完即交给调用方。
+    'L' 时直接以灰度色彩空间渲染，像素数据只有 RGB 的三分之一。
+    """
+    if not HAS_FITZ:
+        yield from _as_mode(pdf2image.convert_from_path(
+            pdf_path, poppler_path=POPPLER_PATH, dpi=dpi, thread_count=4
+        ), mode)
+        return
+
+    doc = fitz.open(pdf_path)
+    try:
+        mat = fitz.Matrix(dpi / 72, dpi / 72)
+        cs = _colorspace(mode)
+        for page in doc:
+            pix = page.get_pixmap(matrix=mat, colorspace=cs, alpha=False)
+            img = _wrap_samples(pix.width, pix.height, pix.samples_mv, mode)
+            # samples_mv 不持有 pixmap，'L' 图像又直接映射这块内存，须让 pixmap 与图像同生命周期
+            img._pixmap = pix
+            pix = None
+            yield img
+    finally:
+        doc.close()
+
+
+def _wrap_samples(width: int, height: int, samples, mode: str = 'RGB') -> Image.Image:
+    """把像素缓冲区包装为 PIL 图像
+
+    直接读取 pixmap 的 samples_mv（memoryview），不再先经 samples 复制出一份 bytes。
+    'L' 图像直接共享该缓冲区；Pillow 内部以 4 字节/像素存放 RGB，这时仍有一次必要的展开复制。
+    """
+    return Image.frombuffer(mode, (width, height), samples, "raw", mode, 0, 1)
+
+
+def _render_range(pdf_path: str, dpi: int, start: int, end: int,
+                  mode: str = 'RGB') -> List[Tuple[int, int, bytes]]:
+    """子进程：渲染 [start, end) 页，返回 (宽, 高, 原始像素字节)，避免跨进程序列化 PIL 对象"""
+    with fitz.open(pdf_path) as doc:
+        mat = fitz.Matrix(dpi / 72, dpi / 72)
+        cs = _colorspace(mode)
+        result = []
+        for i in range(start, end):
+            pix = doc[i].get_pixmap(matrix=mat, colorspace=cs, alpha=False)
+            result.append((pix.width, pix.height, pix.samples))
+            pix = None
+        return result
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """取得共用进程池，首次调用时以 workers 个进程创建"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def shutdown_pool():
+    """结束共用进程池（退出时由 atexit 调用，界面退出时也可提前调用）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+atexit.register(shutdown_pool)
+
+
+def render_pages_parallel(pdf_path: str, dpi: int, total_pages: int,
+                          workers: int, mode: str = 'RGB') -> Iterator[Image.Image]:
+    """用多个进程并行渲染，按页序逐页生成 mode 图像
+
+    页面按小块提交到共用进程池，同时在途的块数限制为 workers 的两倍，
+    按提交顺序取结果，既保持页序也限制了内存中缓存的页数。
+    """
+    chunks = iter([(start, min(start + _CHUNK_PAGES, total_pages))
+                   for start in range(0, total_pages, _CHUNK_PAGES)])
+    pool = _get_pool(workers)
+    try:
+        pending = deque(pool.submit(_render_range, pdf_path, dpi, start, end, mode)
+                        for start, end in islice(chunks, workers * 2))
+        while pending:
+            rendered = pending.popleft().result()
+            for start, end in islice(chunks, 1):
+                pending.append(pool.submit(_render_range, pdf_path, dpi, start, end, mode))
+            for width, height, samples in rendered:
+                yield _wrap_samples(width, height, samples, mode)
+            rendered = None
+    except BrokenProcessPool:
+        shutdown_pool()  # 子进程异常退出后进程池不可再用，下个文档重新创建
+        raise
+
+
+def open_pages(pdf_path: str, dpi: int, workers: int = 1,
+               mode: str = 'RGB') -> Tuple[List[Tuple[int, int]], Iterator[Image.Image]]:
+    """返回 (各页像素尺寸, 逐页图像迭代器)
+
+    fitz 可直接由页面尺寸算出渲染后的像素大小，无需光栅化，
+    调用方可先分配画布，再边渲染边粘贴，任意时刻只持有一页图像。
+    workers > 1 且文档总像素超过 _PARALLEL_PIXELS 时用多进程渲染（调用方的入口需调用
+    multiprocessing.freeze_support() 以支持打包后的应用）；小文档逐页渲染，不必启动子进程。
+    回退到 pdf2image 时只能先整体渲染，迭代器会在交出每页后释放对它的引用。
+    mode 为交出的图像模式（'RGB' 或 detect_mode 得到的 'L'）。
+    """
+    if HAS_FITZ:
+        with fitz.open(pdf_path) as doc:
+            mat = fitz.Matrix(dpi / 72, dpi / 72)
+            sizes = [(r.width, r.height) for r in ((page.rect * mat).irect for page in doc)]
+        if (workers > 1 and len(sizes) > _CHUNK_PAGES and
+                sum(w * h for w, h in sizes) > _PARALLEL_PIXELS):
+            pages = render_pages_parallel(pdf_path, dpi, len(sizes), workers, mode)
+        else:
+            pages = render_pages(pdf_path, dpi, mode)
+    else:
+        images = list(render_pages(pdf_path, dpi, mode))
+        sizes, pages = [img.size for img in images], drain(images)
+    return sizes, pages
+
+
+def drain(images: List[Image.Image]) -> Iterator[Image.Image]:
+    """按顺序交出列表中的图像，并同时从列表中移除，方便逐页释放内存"""
+    images.reverse()
+    while images:
+        yield images.pop()
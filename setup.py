@@ -14,6 +14,34 @@ if sys.platform != 'darwin':
     print("This setup script is for macOS only!")
     sys.exit(1)
 
+def check_libjpeg_turbo():
+    """确认打包进应用的 Pillow 使用 libjpeg-turbo（SIMD 加速的 JPEG 编码）
+
+    PyPI 上的 Pillow wheel 本身已链接 libjpeg-turbo，默认只做检查；
+    设置 F2LI_BUILD_PILLOW_TURBO=1 时，从源码针对 Homebrew 的 jpeg-turbo 重新编译 Pillow。
+    """
+    if os.environ.get('F2LI_BUILD_PILLOW_TURBO') == '1':
+        import subprocess
+        prefix = subprocess.run(['brew', '--prefix', 'jpeg-turbo'], check=True,
+                                capture_output=True, text=True).stdout.strip()
+        env = dict(os.environ,
+                   CFLAGS=f"-I{prefix}/include " + os.environ.get('CFLAGS', ''),
+                   LDFLAGS=f"-L{prefix}/lib " + os.environ.get('LDFLAGS', ''))
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '--force-reinstall',
+                        '--no-binary', 'Pillow', 'Pillow>=10.0.0,<11.0.0'],
+                       check=True, env=env)
+        # 当前进程已导入的旧 PIL 不受影响，py2app 打包时收集的是新安装的版本
+    
+    try:
+        from PIL import features
+        if not features.check_feature('libjpeg_turbo'):
+            print("警告: 当前 Pillow 未使用 libjpeg-turbo，JPG 输出会较慢。"
+                  "可设置 F2LI_BUILD_PILLOW_TURBO=1 重新编译 Pillow")
+    except ImportError:
+        pass
+
+check_libjpeg_turbo()
+
 APP = ['mac_app.py']
 DATA_FILES = [
     ('', ['config.py']),
@@ -78,6 +106,10 @@ OPTIONS = {
     ],
     'includes': [
         'config',
+        'pdf_renderer',
+        'image_writer',
+        'output_cache',
+        'office_server',
     ],
     'excludes': [
         'matplotlib',
@@ -121,6 +153,7 @@ setup(
     install_requires=[
         'Pillow>=10.0.0,<11.0.0',
         'pdf2image==1.16.3',
+        'PyMuPDF>=1.23.0',
         'tkinterdnd2',
     ],
 )
\ No newline at end of file
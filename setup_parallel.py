@@ -3,11 +3,17 @@ py2app build script for File2LongImage (Parallel Version)
 
 Usage:
     python setup_parallel.py py2app
+    BUILD_VARIANT=headless python setup_parallel.py py2app   # 无界面命令行版
 """
 
 from setuptools import setup
 import sys
 import os
+import shutil
+import subprocess
+import platform
+import py_compile
+from pathlib import Path
 
 # 确保在 macOS 上运行
 if sys.platform != 'darwin':
@@ -20,10 +26,13 @@ DATA_FILES = [
     ('assets', ['assets/demo.png', 'assets/demo-parallel.png']),
 ]
 
-# 创建必要的目录
-os.makedirs('output', exist_ok=True)
-os.makedirs('.intermediate', exist_ok=True)
-os.makedirs('logs', exist_ok=True)
+# 运行时目录：包内只放空目录（见 build_app.post_build），不复制开发机上的输出和日志
+RUNTIME_DIRS = ('output', '.intermediate', 'logs')
+
+# 只在真正构建时创建，读取元数据（python setup.py --name 等）不改动工作目录
+if __name__ == '__main__' and 'py2app' in sys.argv:
+    for d in RUNTIME_DIRS:
+        os.makedirs(d, exist_ok=True)
 
 OPTIONS = {
     'argv_emulation': False,
@@ -71,31 +80,21 @@ OPTIONS = {
         'NSDocumentsFolderUsageDescription': 'File2LongImage needs access to read and save documents.',
         'NSDownloadsFolderUsageDescription': 'File2LongImage needs access to read files from Downloads.',
     },
+    # packages 会整包递归复制，只保留确实需要完整目录的包；
+    # 标准库模块由 modulegraph 自动分析导入关系，无需列出
     'packages': [
-        'PIL', 
         'pdf2image',
         'tkinter',
-        'concurrent.futures',
-        'dataclasses',
-        'enum',
-        'uuid',
     ],
+    # 只列出静态分析发现不了的动态导入
     'includes': [
         'config',
         'error_logger',
-        'subprocess',
-        'hashlib',
-        'threading',
-        'pathlib',
-        'queue',
-        'time',
-        'webbrowser',
-        'traceback',
-        'json',
-        'platform',
-        'psutil',
-        'shutil',
-        'tempfile',
+        'psutil',               # error_logger / _warm_imports 中按需导入
+        'PIL.Image',
+        'PIL.PngImagePlugin',   # 编解码插件由 Image.preinit() 动态加载
+        'PIL.JpegImagePlugin',
+        'PIL.PpmImagePlugin',   # pdf2image 默认输出 PPM
     ],
     'excludes': [
         'matplotlib',
@@ -107,39 +106,211 @@ OPTIONS = {
         'pip',
         'IPython',
         'jupyter',
+        # 未使用的 PIL 模块
+        'PIL.ImageTk',
+        'PIL.ImageQt',
+        'PIL.ImageShow',
+        'PIL.SpiderImagePlugin',
+        # 未使用的标准库部分
+        'tkinter.test',
+        'distutils',
+        'unittest',
+        'email.test',
+        'test',
+        'xml.dom',
+        'pydoc_data',
+        'lib2to3',
+        'curses',
     ],
-    'resources': [
-        'output',
-        '.intermediate',
-        'logs',
-    ],
+    'resources': [],
     'frameworks': [],
     'dylib_excludes': [],
     'strip': True,
-    'optimize': 1,  # 降低优化级别以便调试
+    'optimize': 2,  # 相当于 python -OO：去掉 docstring 和 assert，.pyc 更小、加载更快
 }
 
-# 尝试包含 Poppler 二进制文件
-poppler_paths = ['/opt/homebrew/bin', '/usr/local/bin']
-for poppler_path in poppler_paths:
-    if os.path.exists(poppler_path):
-        poppler_binaries = [
-            'pdfinfo',
-            'pdftocairo', 
-            'pdftotext',
-            'pdftoppm',
-        ]
-        for binary in poppler_binaries:
-            binary_path = os.path.join(poppler_path, binary)
-            if os.path.exists(binary_path):
-                DATA_FILES.append(('poppler', [binary_path]))
-        break
+# 调试构建保留 docstring 和 assert：DEBUG_BUILD=1 python setup_parallel.py py2app
+if os.getenv('DEBUG_BUILD'):
+    OPTIONS['optimize'] = 0
+
+# 无界面构建：BUILD_VARIANT=headless python setup_parallel.py py2app
+# 只打包命令行入口，不含 tkinter 及 Tcl/Tk 框架，输出到 dist/cli，可与界面版并存
+BUILD_VARIANT = os.getenv('BUILD_VARIANT', 'gui')
+APP_NAME = 'File2LongImage'
+
+if BUILD_VARIANT == 'headless':
+    APP_NAME = 'File2LongImage-cli'  # 同时决定 .app 名称
+    APP = ['cli_entrypoint.py']
+    OPTIONS['packages'].remove('tkinter')
+    OPTIONS['excludes'] += ['tkinter', '_tkinter']  # PIL.ImageTk 已在上面排除
+    OPTIONS['dist_dir'] = os.path.join('dist', 'cli')
+    plist = OPTIONS['plist']
+    plist.pop('CFBundleDocumentTypes')  # 不需要文件关联
+    plist.update({
+        'CFBundleName': APP_NAME,
+        'CFBundleDisplayName': 'File2LongImage 命令行版',
+        'CFBundleIdentifier': 'com.file2longimage.cli',
+        'LSUIElement': True,  # 不显示 Dock 图标
+    })
+
+# 打包 Poppler：pdf2image 只调用 pdftoppm 和 pdfinfo
+POPPLER_TOOLS = ['pdftoppm', 'pdfinfo']
+POPPLER_STAGE = os.path.join('build', 'poppler')
+
+
+def _otool_deps(binary):
+    """列出 Mach-O 文件依赖的动态库（otool -L 的安装名）"""
+    output = subprocess.check_output(['otool', '-L', binary], text=True)
+    return [line.split()[0] for line in output.splitlines()[1:] if line.strip()]
+
+
+def _resolve_dep(name, referrer):
+    """把安装名解析为磁盘上的路径；系统库返回 None"""
+    if name.startswith(('/usr/lib/', '/System/')):
+        return None
+    if name.startswith(('@loader_path/', '@rpath/', '@executable_path/')):
+        base = name.split('/', 1)[1]
+        here = os.path.dirname(os.path.realpath(referrer))
+        for candidate in (os.path.join(here, base), os.path.join(here, '..', 'lib', base)):
+            if os.path.exists(candidate):
+                return os.path.realpath(candidate)
+        return None
+    return os.path.realpath(name) if os.path.exists(name) else None
+
+
+def collect_poppler(search_paths=('/opt/homebrew/bin', '/usr/local/bin')):
+    """把 Poppler 工具及其全部非系统动态库复制到 build/poppler，并改写为包内相对引用
+
+    工具放在 Resources/poppler，依赖库放在 Resources/poppler/lib：
+    工具通过 @executable_path/lib 引用，库之间通过 @loader_path 引用，
+    用户机器上没有 Homebrew 也能运行。返回 DATA_FILES 条目。
+    """
+    tools = []
+    for tool in POPPLER_TOOLS:
+        for directory in search_paths:
+            path = os.path.join(directory, tool)
+            if os.path.exists(path):
+                tools.append(os.path.realpath(path))
+                break
+    if not tools:
+        print("未找到 Poppler，应用将使用系统中安装的 Poppler")
+        return []
+
+    lib_dir = os.path.join(POPPLER_STAGE, 'lib')
+    shutil.rmtree(POPPLER_STAGE, ignore_errors=True)
+    os.makedirs(lib_dir)
+
+    # 遍历依赖闭包：源路径 → 包内副本
+    copies = {}
+    pending = list(tools)
+    while pending:
+        source = pending.pop()
+        if source in copies:
+            continue
+        is_tool = source in tools
+        target = os.path.join(POPPLER_STAGE if is_tool else lib_dir, os.path.basename(source))
+        shutil.copy2(source, target)
+        os.chmod(target, 0o755)
+        copies[source] = target
+
+        prefix = '@executable_path/lib' if is_tool else '@loader_path'
+        if not is_tool:
+            subprocess.check_call(['install_name_tool', '-id',
+                                   f'@loader_path/{os.path.basename(source)}', target])
+        for dep in _otool_deps(source):
+            resolved = _resolve_dep(dep, source)
+            if resolved is None or resolved == source:
+                continue
+            subprocess.check_call(['install_name_tool', '-change', dep,
+                                   f'{prefix}/{os.path.basename(resolved)}', target])
+            pending.append(resolved)
+
+    # install_name_tool 会使原签名失效，arm64 上必须重新（临时）签名才能运行
+    for target in copies.values():
+        subprocess.check_call(['codesign', '--force', '--sign', '-', target])
+
+    libs = sorted(t for t in copies.values() if os.path.dirname(t) == lib_dir)
+    print(f"已打包 Poppler：{len(tools)} 个工具，{len(libs)} 个依赖库")
+    return [
+        ('poppler', sorted(t for t in copies.values() if t not in libs)),
+        ('poppler/lib', libs),
+    ]
+
+
+if 'py2app' in sys.argv:
+    DATA_FILES.extend(collect_poppler())
+
+
+def thin_binaries(bundle: Path, arch=None):
+    """剥离包内 .so/.dylib 的本地符号和调试信息，并把通用二进制瘦身为 arch 单一架构
+
+    arch 为 None 时保留所有架构。strip / lipo 会使原签名失效，处理过的文件重新做临时签名
+    （正式签名由 build_mac.sh 在之后统一完成）。
+    """
+    saved = 0
+    for path in [*bundle.rglob('*.so'), *bundle.rglob('*.dylib')]:
+        if path.is_symlink():
+            continue
+        before = path.stat().st_size
+        archs = subprocess.run(['lipo', '-archs', str(path)], capture_output=True,
+                               text=True).stdout.split()
+        if len(archs) > 1 and arch in archs:
+            subprocess.run(['lipo', str(path), '-thin', arch, '-output', str(path)], check=True)
+        subprocess.run(['strip', '-x', '-S', str(path)], capture_output=True)
+        subprocess.run(['codesign', '--force', '--sign', '-', str(path)], capture_output=True)
+        saved += before - path.stat().st_size
+    print(f"二进制瘦身完成，减少 {saved / 1024 / 1024:.1f} MB")
+
+
+def precompile_sources(bundle: Path, optimize: int):
+    """把包内 lib/ 下仍以源码形式存在的模块编译为无源码的 .pyc，并删除 .py
+
+    使用不校验源码的哈希式 .pyc（UNCHECKED_HASH）：导入时不再逐个 stat 源文件比对时间戳，
+    包内的小文件数量也减半。Resources 根目录下的启动脚本（__boot__.py 等）由 py2app
+    以源码方式执行，保持不动。
+    """
+    removed = 0
+    for source in (bundle / 'Contents' / 'Resources' / 'lib').rglob('*.py'):
+        py_compile.compile(str(source), cfile=str(source.with_suffix('.pyc')),
+                           dfile=str(source.relative_to(bundle)), doraise=True,
+                           optimize=optimize,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        source.unlink()
+        removed += 1
+    print(f"已预编译并移除 {removed} 个 .py 源文件")
+
+
+CMDCLASS = {}
+try:
+    from py2app.build_app import py2app as _py2app
+except ImportError:  # 只读取元数据时不需要 py2app
+    _py2app = None
+
+if _py2app is not None:
+    class build_app(_py2app):
+        """在 py2app 构建完成后对 .app 做后处理"""
+
+        def run(self):
+            super().run()
+            for bundle in Path(self.dist_dir).glob('*.app'):
+                self.post_build(bundle)
+
+        def post_build(self, bundle: Path):
+            # F2LI_UNIVERSAL=1 时保留通用二进制（同时支持 Intel 与 Apple Silicon）
+            arch = None if os.getenv('F2LI_UNIVERSAL') else platform.machine()
+            thin_binaries(bundle, arch)
+            precompile_sources(bundle, OPTIONS['optimize'])
+            for d in RUNTIME_DIRS:
+                (bundle / 'Contents' / 'Resources' / d).mkdir(exist_ok=True)
+
+    CMDCLASS['py2app'] = build_app
 
 setup(
-    name='File2LongImage',
+    name=APP_NAME,
     app=APP,
     data_files=DATA_FILES,
     options={'py2app': OPTIONS},
+    cmdclass=CMDCLASS,
     setup_requires=['py2app'],
     install_requires=[
         'Pillow>=10.0.0,<11.0.0',